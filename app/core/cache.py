@@ -0,0 +1,162 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, TypeVar
+
+from beanie import Document, PydanticObjectId
+from beanie.operators import In
+
+from app.core.config import settings
+
+DocumentoT = TypeVar("DocumentoT", bound=Document)
+
+
+class BackendMemoria:
+    """LRU com TTL no próprio processo. Cada worker tem o seu; a invalidação só vale localmente."""
+
+    def __init__(self, max_itens: int, ttl: float):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def obter_varios(self, chaves: list[str]) -> list[str | None]:
+        agora = time.monotonic()
+        valores = []
+        for chave in chaves:
+            item = self._itens.get(chave)
+            if item is None or item[0] < agora:
+                self._itens.pop(chave, None)
+                valores.append(None)
+            else:
+                self._itens.move_to_end(chave)
+                valores.append(item[1])
+        return valores
+
+    async def gravar_varios(self, itens: dict[str, str]):
+        expira_em = time.monotonic() + self.ttl
+        for chave, valor in itens.items():
+            self._itens[chave] = (expira_em, valor)
+            self._itens.move_to_end(chave)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    async def remover(self, chaves: list[str]):
+        for chave in chaves:
+            self._itens.pop(chave, None)
+
+    def tamanho(self) -> int | None:
+        return len(self._itens)
+
+
+class BackendRedis:
+    """Cache compartilhado entre workers (Redis ou compatível); a expiração fica com o servidor."""
+
+    def __init__(self, url: str, ttl: float, prefixo: str):
+        # Dependência opcional: pip install -e ".[redis]"
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.prefixo = prefixo
+
+    async def obter_varios(self, chaves: list[str]) -> list[str | None]:
+        return await self.redis.mget([self.prefixo + chave for chave in chaves])
+
+    async def gravar_varios(self, itens: dict[str, str]):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for chave, valor in itens.items():
+                pipe.set(self.prefixo + chave, valor, px=int(self.ttl * 1000))
+            await pipe.execute()
+
+    async def remover(self, chaves: list[str]):
+        await self.redis.delete(*(self.prefixo + chave for chave in chaves))
+
+    def tamanho(self) -> int | None:
+        return None
+
+
+class CacheDocumentos:
+    """
+    Cache read-through de documentos por ID.
+    Guarda o JSON do documento, então cada leitura devolve uma instância nova (sem estado
+    compartilhado entre requisições). As rotas de escrita chamam invalidar.
+    """
+
+    def __init__(self, backend: BackendMemoria | BackendRedis | None):
+        self.backend = backend
+        self._acertos: dict[str, int] = {}
+        self._falhas: dict[str, int] = {}
+
+    @staticmethod
+    def _chave(modelo: type[Document], id: PydanticObjectId) -> str:
+        return f"{modelo.get_collection_name()}:{id}"
+
+    def _contar(self, modelo: type[Document], acertos: int, falhas: int):
+        nome = modelo.get_collection_name()
+        self._acertos[nome] = self._acertos.get(nome, 0) + acertos
+        self._falhas[nome] = self._falhas.get(nome, 0) + falhas
+
+    async def obter_varios(
+        self, modelo: type[DocumentoT], ids: Iterable[PydanticObjectId]
+    ) -> dict[PydanticObjectId, DocumentoT]:
+        """Busca vários documentos: os que faltam no cache vêm do banco em uma única consulta $in."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        if self.backend is None:
+            documentos = await modelo.find(In(modelo.id, ids)).to_list()
+            return {documento.id: documento for documento in documentos}
+
+        valores = await self.backend.obter_varios([self._chave(modelo, id) for id in ids])
+        encontrados = {
+            id: modelo.model_validate_json(valor)
+            for id, valor in zip(ids, valores)
+            if valor is not None
+        }
+        faltando = [id for id in ids if id not in encontrados]
+        self._contar(modelo, len(encontrados), len(faltando))
+
+        if faltando:
+            documentos = await modelo.find(In(modelo.id, faltando)).to_list()
+            await self.backend.gravar_varios({
+                self._chave(modelo, documento.id): documento.model_dump_json()
+                for documento in documentos
+            })
+            encontrados.update({documento.id: documento for documento in documentos})
+
+        return encontrados
+
+    async def obter(self, modelo: type[DocumentoT], id: PydanticObjectId) -> DocumentoT | None:
+        """Busca um documento pelo ID, passando pelo cache."""
+        return (await self.obter_varios(modelo, [id])).get(id)
+
+    async def invalidar(self, modelo: type[Document], *ids: PydanticObjectId):
+        """Remove documentos do cache depois de uma escrita."""
+        if self.backend is not None and ids:
+            await self.backend.remover([self._chave(modelo, id) for id in ids])
+
+    def estatisticas(self) -> dict:
+        """Acertos, falhas e taxa de acerto por coleção (contadores deste processo)."""
+        colecoes = {}
+        for nome in self._acertos.keys() | self._falhas.keys():
+            acertos, falhas = self._acertos.get(nome, 0), self._falhas.get(nome, 0)
+            colecoes[nome] = {
+                "acertos": acertos,
+                "falhas": falhas,
+                "taxa_acerto": round(acertos / (acertos + falhas), 4) if acertos + falhas else None,
+            }
+        return {
+            "backend": settings.CACHE_BACKEND,
+            "itens": self.backend.tamanho() if self.backend is not None else 0,
+            "colecoes": colecoes,
+        }
+
+
+def _criar_backend():
+    if settings.CACHE_BACKEND == "memoria":
+        return BackendMemoria(settings.CACHE_MAX_ITENS, settings.CACHE_TTL)
+    if settings.CACHE_BACKEND == "redis":
+        return BackendRedis(settings.REDIS_URL, settings.CACHE_TTL, f"{settings.DATABASE_NAME}:")
+    return None
+
+
+cache = CacheDocumentos(_criar_backend())
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -5,6 +7,53 @@ class Settings(BaseSettings):
     MONGO_URI: str
     DATABASE_NAME: str
 
+    # Paginação: por quanto tempo (segundos) a contagem de uma busca filtrada fica em cache
+    COUNT_CACHE_TTL: float = 30.0
+
+    # Inicialização: o seed é um comando à parte (python -m app.utils.seeder) e, com vários
+    # workers, os índices podem ser criados uma única vez (python -m app.utils.migracoes indices)
+    SEED_ON_STARTUP: bool = False
+    CREATE_INDEXES_ON_STARTUP: bool = True
+
+    # Intervalo (segundos) entre tentativas de conexão com o banco na inicialização
+    DB_RETRY_INTERVAL: float = 2.0
+
+    # Cache de Produto/Cliente por ID: memoria (por processo), redis (compartilhado) ou desligado
+    CACHE_BACKEND: Literal["memoria", "redis", "desligado"] = "memoria"
+    CACHE_TTL: float = 60.0
+    CACHE_MAX_ITENS: int = 10_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Exportação: documentos por lote do cursor e linhas por bloco enviado na resposta
+    EXPORT_BATCH_SIZE: int = 2000
+    EXPORT_BLOCK_SIZE: int = 500
+
+    # Importações em lote: linhas por bulk_write
+    BULK_BATCH_SIZE: int = 1000
+
+    # Conexão com o MongoDB; None mantém o padrão do driver (ou o valor informado na URI)
+    MONGO_MAX_POOL_SIZE: int | None = None
+    MONGO_MIN_POOL_SIZE: int | None = None
+    MONGO_MAX_IDLE_TIME_MS: int | None = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int | None = None
+    # Compressão do protocolo, em ordem de preferência (ex.: "zstd,snappy,zlib"); zstd e snappy
+    # exigem os pacotes do extra: pip install -e ".[compressao]"
+    MONGO_COMPRESSORS: str | None = None
+    # Write concern (ex.: "majority" ou "1") e read concern padrão das rotas transacionais
+    MONGO_WRITE_CONCERN: str | None = None
+    MONGO_READ_CONCERN: Literal["local", "available", "majority", "linearizable", "snapshot"] | None = None
+
+    # Leituras de analytics e exportação: podem ir para secundários, longe do fluxo de compra
+    ANALYTICS_READ_PREFERENCE: Literal[
+        "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+    ] = "primary"
+    ANALYTICS_READ_CONCERN: Literal["local", "available", "majority"] | None = None
+    # Atraso máximo (segundos, mínimo 90) aceito de um secundário; None = sem limite
+    ANALYTICS_MAX_STALENESS_S: int | None = None
+
+    # Observabilidade: comandos do MongoDB acima deste tempo (ms) vão para o log (0 desliga)
+    SLOW_QUERY_MS: float = 100.0
+
     # Configuração para ler o arquivo .env automaticamente
     model_config = SettingsConfigDict(env_file=".env")
 
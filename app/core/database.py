@@ -1,26 +1,155 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from beanie import Document, init_beanie
+from pymongo.errors import ConfigurationError, OperationFailure, PyMongoError
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from app.core.config import settings
+from app.core.metricas import monitor_comandos
 
 # 1. IMPORTANTE: Importe o modelo aqui
 from app.models.produto import Produto
 from app.models.cliente import Cliente
 from app.models.pedido import Pedido
+from app.models.resumo import ResumoPedidosDia, ResumoVendasCategoria, ResumoProdutosCategoria
+from app.models.versao import VersaoColecao
 
 # Cliente global do MongoDB
 client: AsyncIOMotorClient = None
 db = None
 
-async def init_db():
-    global client, db
-    client = AsyncIOMotorClient(settings.MONGO_URI)
+# Modelos registrados no Beanie (e cujos índices são criados)
+MODELOS = [
+    Produto,
+    Cliente,
+    Pedido,
+    ResumoPedidosDia,
+    ResumoVendasCategoria,
+    ResumoProdutosCategoria,
+    VersaoColecao
+]
+
+# Indica se o Beanie já foi inicializado (a API pode subir antes do banco estar acessível)
+_inicializado = False
+
+# Transações exigem replica set ou mongos; descoberto na primeira transação pedida
+_suporta_transacoes: bool | None = None
+
+def opcoes_cliente() -> dict:
+    """Opções do AsyncIOMotorClient a partir das settings; as não definidas ficam com o padrão do driver."""
+    opcoes = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "compressors": settings.MONGO_COMPRESSORS,
+        "readConcernLevel": settings.MONGO_READ_CONCERN,
+    }
+    if settings.MONGO_WRITE_CONCERN is not None:
+        w = settings.MONGO_WRITE_CONCERN
+        opcoes["w"] = int(w) if w.isdigit() else w
+    return {chave: valor for chave, valor in opcoes.items() if valor is not None}
+
+async def init_db(indices: bool = True):
+    """Conecta ao MongoDB e registra os modelos; indices=False não verifica/cria índices."""
+    global client, db, _inicializado
+    # O listener mede cada comando enviado ao banco (exposto em /metrics).
+    # tz_aware: datas lidas do banco voltam em UTC com fuso, no mesmo formato das recém-criadas
+    client = AsyncIOMotorClient(
+        settings.MONGO_URI, tz_aware=True, event_listeners=[monitor_comandos], **opcoes_cliente()
+    )
     db = client[settings.DATABASE_NAME]
     
-    await init_beanie(
-        database=db,
-        document_models=[
-            Produto,
-            Cliente,
-            Pedido
-        ]
-    )
\ No newline at end of file
+    await init_beanie(database=db, document_models=MODELOS, skip_indexes=True)
+    if indices:
+        await criar_indices()
+    _inicializado = True
+
+async def conectar_banco():
+    """
+    Tenta init_db até o banco responder, sem derrubar a API enquanto ele está fora.
+    Erros de configuração (URI inválida) e de comando (ex.: conflito de índice) não se
+    resolvem esperando, então sobem na hora em vez de repetir.
+    """
+    global client
+    while True:
+        try:
+            await init_db(indices=settings.CREATE_INDEXES_ON_STARTUP)
+            return
+        except (ConfigurationError, OperationFailure):
+            raise
+        except PyMongoError as exc:
+            if client is not None:
+                client.close()
+                client = None
+            print(f"⚠️  Banco indisponível ({exc}). Nova tentativa em {settings.DB_RETRY_INTERVAL}s...")
+            await asyncio.sleep(settings.DB_RETRY_INTERVAL)
+
+async def banco_pronto(timeout: float = 2.0) -> bool:
+    """Indica se os modelos estão inicializados e o banco responde a um ping."""
+    if not _inicializado:
+        return False
+    try:
+        await asyncio.wait_for(client.admin.command("ping"), timeout)
+        return True
+    except (PyMongoError, asyncio.TimeoutError):
+        return False
+
+def colecao_analytics(modelo: type[Document]) -> AsyncIOMotorCollection:
+    """
+    Coleção do modelo com a read preference/read concern de analytics
+    (ex.: secondaryPreferred), para relatórios não disputarem o primário com as compras.
+    """
+    opcoes = {
+        "read_preference": make_read_preference(
+            read_pref_mode_from_name(settings.ANALYTICS_READ_PREFERENCE),
+            None,
+            settings.ANALYTICS_MAX_STALENESS_S or -1
+        )
+    }
+    if settings.ANALYTICS_READ_CONCERN is not None:
+        opcoes["read_concern"] = ReadConcern(settings.ANALYTICS_READ_CONCERN)
+    return modelo.get_motor_collection().with_options(**opcoes)
+
+async def remover_indices_texto_antigos() -> list[str]:
+    """
+    Remove índices de texto de produtos com nome diferente do declarado no modelo.
+    A coleção aceita um único índice de texto, então o antigo precisa sair antes do novo ser criado.
+    """
+    colecao = Produto.get_motor_collection()
+    declarados = {indice.document["name"] for indice in Produto.Settings.indexes}
+    removidos = []
+    for nome, detalhes in (await colecao.index_information()).items():
+        if any(chave == "_fts" or tipo == "text" for chave, tipo in detalhes["key"]) and nome not in declarados:
+            await colecao.drop_index(nome)
+            removidos.append(nome)
+    return removidos
+
+async def criar_indices() -> list[str]:
+    """
+    (Re)cria os índices declarados nos modelos, por exemplo depois de apagar coleções.
+    Antes, remove o índice de texto antigo que impediria a criação do atual; devolve os removidos.
+    """
+    removidos = await remover_indices_texto_antigos()
+    await init_beanie(database=db, document_models=MODELOS)
+    return removidos
+
+async def suporta_transacoes() -> bool:
+    """Indica se o servidor aceita transações (membro de replica set ou mongos)."""
+    global _suporta_transacoes
+    if _suporta_transacoes is None:
+        hello = await client.admin.command("hello")
+        _suporta_transacoes = "setName" in hello or hello.get("msg") == "isdbgrid"
+    return _suporta_transacoes
+
+async def em_transacao(operacao):
+    """
+    Executa operacao(sessao) dentro de uma transação, repetindo-a em conflitos transitórios.
+    Em servidores sem suporte a transações, chama operacao(None): quem escreve precisa compensar.
+    """
+    if not await suporta_transacoes():
+        return await operacao(None)
+
+    async with await client.start_session() as sessao:
+        return await sessao.with_transaction(operacao)
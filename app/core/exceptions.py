@@ -1,10 +1,12 @@
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pymongo.errors import DuplicateKeyError, PyMongoError
 from beanie.exceptions import DocumentNotFound
 
+from app.utils.cache_http import NaoModificado
+
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handler para erros de validação (HTTP 422)."""
@@ -71,6 +73,11 @@ async def pymongo_exception_handler(request: Request, exc: PyMongoError):
     )
 
 
+async def not_modified_handler(request: Request, exc: NaoModificado):
+    """Handler do GET condicional: o ETag do cliente ainda é o atual (HTTP 304, sem corpo)."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=exc.headers)
+
+
 async def general_exception_handler(request: Request, exc: Exception):
     """Handler genérico para erros não tratados (HTTP 500)."""
     print(f"❌ ERRO CRÍTICO: {type(exc).__name__}: {exc}") 
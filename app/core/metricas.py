@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from bson import json_util
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.mongo")
+
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_IDAS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 32)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes: tuple[str, ...], valores: tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Histograma:
+    """Histograma no formato do Prometheus; os eventos do pymongo chegam de outras threads."""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...], buckets: tuple[float, ...]):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+        self._trava = threading.Lock()
+
+    def observar(self, valores: tuple[str, ...], valor: float):
+        with self._trava:
+            serie = self._series.get(valores)
+            if serie is None:
+                # [contagem por bucket, soma, total]
+                serie = self._series[valores] = [[0] * len(self.buckets), 0.0, 0]
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def total(self) -> int:
+        """Observações registradas em todas as séries."""
+        with self._trava:
+            return sum(serie[2] for serie in self._series.values())
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._trava:
+            series = [(valores, list(serie[0]), serie[1], serie[2]) for valores, serie in self._series.items()]
+        for valores, buckets, soma, total in sorted(series):
+            for limite, quantidade in zip(self.buckets, buckets):
+                le = f'le="{limite}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, valores, le)} {quantidade}")
+            le = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, valores, le)} {total}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, valores)} {soma}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, valores)} {total}")
+        return linhas
+
+
+class Contador:
+    """Contador monotônico no formato do Prometheus."""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple[str, ...]):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._series: dict[tuple[str, ...], int] = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, valores: tuple[str, ...], quantidade: int = 1):
+        with self._trava:
+            self._series[valores] = self._series.get(valores, 0) + quantidade
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._trava:
+            series = sorted(self._series.items())
+        linhas += [f"{self.nome}{_rotulos(self.rotulos, valores)} {total}" for valores, total in series]
+        return linhas
+
+
+latencia_http = Histograma(
+    "http_request_duration_seconds", "Latência das requisições HTTP por rota.",
+    ("method", "route", "status"), BUCKETS_SEGUNDOS
+)
+idas_banco_http = Histograma(
+    "http_request_db_roundtrips", "Comandos enviados ao MongoDB por requisição HTTP.",
+    ("method", "route"), BUCKETS_IDAS
+)
+latencia_mongo = Histograma(
+    "mongodb_command_duration_seconds", "Duração dos comandos do MongoDB por coleção e comando.",
+    ("collection", "command"), BUCKETS_SEGUNDOS
+)
+falhas_mongo = Contador(
+    "mongodb_command_failures_total", "Comandos do MongoDB que terminaram em erro.",
+    ("collection", "command")
+)
+consultas_lentas = Contador(
+    "mongodb_slow_commands_total", "Comandos acima de SLOW_QUERY_MS.",
+    ("collection", "command")
+)
+
+METRICAS = [latencia_http, idas_banco_http, latencia_mongo, falhas_mongo, consultas_lentas]
+
+
+def exportar_metricas() -> str:
+    """Todas as métricas no formato texto do Prometheus (exposição em /metrics)."""
+    return "\n".join(linha for metrica in METRICAS for linha in metrica.exportar()) + "\n"
+
+
+@dataclass
+class ComandoExecutado:
+    comando: str
+    colecao: str
+    duracao: float
+    sucesso: bool = True
+    # Documento do comando, só para diagnóstico (resumido sob demanda)
+    documento: dict = field(default_factory=dict, repr=False)
+
+    def descrever(self) -> str:
+        return f"{self.comando} {self.colecao} ({self.duracao * 1000:.1f} ms) {_resumo(self.comando, self.documento)}"
+
+
+@dataclass
+class ComandosRequisicao:
+    """Comandos enviados ao banco durante uma requisição (ou outro trecho medido)."""
+    rota: str
+    comandos: list[ComandoExecutado] = field(default_factory=list)
+
+
+# O Motor copia o contexto para a thread que executa o comando, então o listener enxerga
+# o objeto da requisição atual e só precisa anexar a ele
+_comandos_atuais: ContextVar[ComandosRequisicao | None] = ContextVar("comandos_atuais", default=None)
+
+
+@contextmanager
+def capturar_comandos(rota: str = "-"):
+    """Captura os comandos enviados ao banco dentro do bloco (inclusive de requisições ASGI feitas nele)."""
+    captura = ComandosRequisicao(rota)
+    token = _comandos_atuais.set(captura)
+    try:
+        yield captura
+    finally:
+        _comandos_atuais.reset(token)
+
+
+def _colecao(comando: str, documento: dict) -> str:
+    if comando == "getMore":
+        return documento.get("collection", "-")
+    alvo = documento.get(comando)
+    return alvo if isinstance(alvo, str) else "-"
+
+
+def _resumo(comando: str, documento: dict) -> str:
+    """Parte do comando que explica a lentidão (filtro, ordenação, pipeline), sem os documentos gravados."""
+    chaves = ("filter", "sort", "pipeline", "updates", "deletes", "query")
+    resumo = {chave: documento[chave] for chave in chaves if chave in documento}
+    if comando in ("update", "delete"):
+        resumo = {chave: [op.get("q") for op in valor] for chave, valor in resumo.items()}
+    return json_util.dumps(resumo)[:1000]
+
+
+class MonitorComandos(monitoring.CommandListener):
+    """Registra duração, falhas e consultas lentas de cada comando enviado ao MongoDB."""
+
+    def __init__(self):
+        self._iniciados: dict[int, tuple[str, dict]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self._iniciados[event.request_id] = (_colecao(event.command_name, event.command), event.command)
+
+    def _finalizar(self, event, sucesso: bool):
+        colecao, documento = self._iniciados.pop(event.request_id, ("-", {}))
+        duracao = event.duration_micros / 1_000_000
+        rotulos = (colecao, event.command_name)
+
+        latencia_mongo.observar(rotulos, duracao)
+        if not sucesso:
+            falhas_mongo.incrementar(rotulos)
+
+        atuais = _comandos_atuais.get()
+        if atuais is not None:
+            atuais.comandos.append(ComandoExecutado(event.command_name, colecao, duracao, sucesso, documento))
+
+        if settings.SLOW_QUERY_MS and duracao * 1000 >= settings.SLOW_QUERY_MS:
+            consultas_lentas.incrementar(rotulos)
+            logger.warning(
+                "Comando lento (%.1f ms) %s em %s.%s [%s]: %s",
+                duracao * 1000, event.command_name, event.database_name, colecao,
+                atuais.rota if atuais else "-", _resumo(event.command_name, documento)
+            )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finalizar(event, True)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finalizar(event, False)
+
+
+monitor_comandos = MonitorComandos()
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI: latência por rota (o caminho declarado, não a URL) e
+    quantidade de comandos enviados ao banco em cada requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        # Uma captura externa (capturar_comandos em volta de um cliente ASGI) também recebe os comandos
+        externa = _comandos_atuais.get()
+        atuais = ComandosRequisicao(scope["path"])
+        token = _comandos_atuais.set(atuais)
+        inicio = time.perf_counter()
+
+        async def _send(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            duracao = time.perf_counter() - inicio
+            _comandos_atuais.reset(token)
+            # Rotas não encontradas ficam juntas para não criar uma série por URL
+            rota = getattr(scope.get("route"), "path", "desconhecida")
+            latencia_http.observar((scope["method"], rota, str(status)), duracao)
+            idas_banco_http.observar((scope["method"], rota), len(atuais.comandos))
+            if externa is not None:
+                externa.comandos.extend(atuais.comandos)
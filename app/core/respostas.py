@@ -0,0 +1,26 @@
+import inspect
+from typing import Any
+
+import orjson
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+# A partir do FastAPI 0.130, rotas com response_model e a classe de resposta padrão geram o JSON
+# direto no pydantic-core (dump_json). Qualquer classe própria desliga esse caminho.
+CAMINHO_RAPIDO = "dump_json" in inspect.signature(serialize_response).parameters
+
+
+class RespostaJSON(JSONResponse):
+    """
+    Resposta das versões sem o caminho rápido: o FastAPI entrega aqui o conteúdo já validado e
+    convertido em tipos JSON, e o orjson gera o corpo no lugar do json.dumps da biblioteca padrão.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def classe_resposta_padrao() -> type[JSONResponse] | DefaultPlaceholder:
+    """Classe de resposta padrão da API: a do próprio FastAPI quando ele já tem o caminho rápido."""
+    return Default(JSONResponse) if CAMINHO_RAPIDO else RespostaJSON
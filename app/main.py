@@ -1,13 +1,20 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from pymongo.errors import DuplicateKeyError, PyMongoError
 
 # Imports de Configuração e Banco
-from app.core.database import init_db
+from app.core.database import conectar_banco, banco_pronto
 from app.core.config import settings
+from app.core.cache import cache
+from app.core.metricas import MetricasMiddleware, exportar_metricas
+from app.core.respostas import classe_resposta_padrao
 from app.utils.seeder import popular_banco
+from app.utils.resumos import reconstruir_resumos
 
 # Imports dos Handlers de Erro (Tratamento Global)
 from app.core.exceptions import (
@@ -15,28 +22,62 @@ from app.core.exceptions import (
     http_exception_handler,
     duplicate_key_exception_handler,
     pymongo_exception_handler,
+    not_modified_handler,
     general_exception_handler
 )
+from app.utils.cache_http import NaoModificado
 
 # Imports das Rotas
 from app.routes import produto_routes
 from app.routes import cliente_routes
 from app.routes import pedido_routes
 from app.routes import analytics_routes
+from app.routes import export_routes
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+logger = logging.getLogger("app")
+
+async def inicializar_banco():
     print("🔄 Conectando ao Banco de Dados...")
-    await init_db()
+    await conectar_banco()
     print("✅ Banco de Dados Conectado!")
-    
-    # Executa o seeder para popular o banco se necessário
-    await popular_banco()
+
+    # O seed normalmente é um comando à parte; SEED_ON_STARTUP=true reativa o seed na subida
+    if settings.SEED_ON_STARTUP:
+        await popular_banco()
+
+def _falha_inicializacao(tarefa: asyncio.Task):
+    """Registra o erro que encerrou a inicialização em segundo plano (senão ele some em silêncio)."""
+    if not tarefa.cancelled() and tarefa.exception() is not None:
+        logger.error("❌ Falha ao inicializar o banco; a API não ficará pronta", exc_info=tarefa.exception())
+
+def _erro_inicializacao() -> BaseException | None:
+    """Erro que encerrou a inicialização do banco, ou None enquanto ela roda ou se terminou bem."""
+    tarefa = getattr(app.state, "inicializacao", None)
+    if tarefa is None or not tarefa.done() or tarefa.cancelled():
+        return None
+    return tarefa.exception()
+
+def _inicializacao_falhou(erro: BaseException) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"status": "falhou", "mensagem": f"Inicialização do banco falhou: {type(erro).__name__}: {erro}"}
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A conexão roda em segundo plano: a API sobe na hora e /health/ready indica quando está pronta
+    inicializacao = asyncio.create_task(inicializar_banco())
+    inicializacao.add_done_callback(_falha_inicializacao)
+    app.state.inicializacao = inicializacao
     
     yield
+    inicializacao.cancel()
     print("🛑 Desligando API...")
 
-app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan, default_response_class=classe_resposta_padrao())
+
+# Latência por rota e comandos ao banco por requisição, expostos em /metrics
+app.add_middleware(MetricasMiddleware)
 
 # --- 1. REGISTRO DE TRATAMENTO DE ERROS (Blindagem da API) ---
 # Conecta as funções do arquivo exceptions.py ao FastAPI
@@ -44,6 +85,7 @@ app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)         # 400, 404, etc
 app.add_exception_handler(DuplicateKeyError, duplicate_key_exception_handler)     # 409
 app.add_exception_handler(PyMongoError, pymongo_exception_handler)                # 503
+app.add_exception_handler(NaoModificado, not_modified_handler)                    # 304
 app.add_exception_handler(Exception, general_exception_handler)                   # 500
 
 # --- 2. REGISTRO DE ROTAS ---
@@ -51,11 +93,40 @@ app.include_router(produto_routes.router)
 app.include_router(cliente_routes.router)
 app.include_router(pedido_routes.router)
 app.include_router(analytics_routes.router)
+app.include_router(export_routes.router)
 
 @app.get("/")
 async def root():
     return {"message": "API rodando! Acesse /docs para testar."}
 
+@app.get("/health", tags=["Health"])
+async def health():
+    """
+    Liveness: o processo está de pé (não consulta o banco).
+    Se a inicialização morreu (URI inválida, conflito de índice), ela não tenta de novo:
+    só reiniciar o processo resolve, então o liveness falha.
+    """
+    if (erro := _erro_inicializacao()) is not None:
+        return _inicializacao_falhou(erro)
+    return {"status": "ok"}
+
+@app.get("/health/ready", tags=["Health"])
+async def health_ready():
+    """Readiness: a inicialização terminou e o banco responde."""
+    if (erro := _erro_inicializacao()) is not None:
+        return _inicializacao_falhou(erro)
+    if not await banco_pronto():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "indisponivel", "mensagem": "Banco de dados ainda não está pronto."}
+        )
+    return {"status": "pronto"}
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metricas():
+    """Métricas deste worker no formato texto do Prometheus."""
+    return PlainTextResponse(exportar_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/admin/reseed", tags=["Admin"])
 async def forcar_reseed():
     """
@@ -63,4 +134,18 @@ async def forcar_reseed():
     ATENÇÃO: Isso apaga todos os dados!
     """
     await popular_banco(force=True)
-    return {"message": "Banco limpo e repopulado com sucesso!"}
\ No newline at end of file
+    return {"message": "Banco limpo e repopulado com sucesso!"}
+
+@app.get("/admin/cache", tags=["Admin"])
+async def estatisticas_cache():
+    """Acertos e falhas do cache de produtos e clientes neste worker."""
+    return cache.estatisticas()
+
+@app.post("/admin/resumos/reconstruir", tags=["Admin"])
+async def reconstruir_resumos_analytics():
+    """
+    Recalcula do zero os resumos usados pelos endpoints de analytics.
+    Use após cargas diretas no banco ou se os resumos divergirem dos pedidos.
+    """
+    await reconstruir_resumos()
+    return {"message": "Resumos de analytics reconstruídos com sucesso!"}
\ No newline at end of file
@@ -1,21 +1,45 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from enum import StrEnum
 from beanie import Document, Link
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 from app.models.cliente import Cliente
 from app.models.produto import Produto
 
+class StatusPedido(StrEnum):
+    """Estados do ciclo de vida do pedido; as transições ficam em app.utils.ciclo_pedido."""
+    PENDENTE = "PENDENTE"
+    PAGO = "PAGO"
+    PROCESSANDO = "PROCESSANDO"
+    ENVIADO = "ENVIADO"
+    ENTREGUE = "ENTREGUE"
+    CANCELADO = "CANCELADO"
+
 class ItemPedido(BaseModel):
     produto: Link[Produto]
+    # Cópia dos dados de exibição do produto no momento da compra (evita joins em relatórios)
+    nome: str | None = None
+    categoria: str | None = None
     quantidade: int = Field(gt=0)
     preco_unitario: float = Field(gt=0)
 
 class Pedido(Document):
     cliente: Link[Cliente]
-    data_emissao: datetime = Field(default_factory=datetime.now)
+    data_emissao: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     itens: list[ItemPedido]
-    status: str = Field(default="PENDENTE")
+    status: StatusPedido = Field(default=StatusPedido.PENDENTE)
     valor_total: float = 0.0
+    # Pedidos criados pela API reservam estoque; os antigos/importados não
+    controla_estoque: bool = False
 
     class Settings:
-        name = "pedidos"
\ No newline at end of file
+        name = "pedidos"
+        indexes = [
+            # Filtros por período (pedidos-por-periodo) com ordenação estável por _id
+            IndexModel([("data_emissao", DESCENDING), ("_id", DESCENDING)]),
+            # Pedidos de um cliente em ordem de emissão
+            IndexModel([("cliente.$id", ASCENDING), ("data_emissao", DESCENDING), ("_id", DESCENDING)]),
+            # Fila por status (ex.: PENDENTE do mais antigo ao mais recente) sem varrer a coleção
+            IndexModel([("status", ASCENDING), ("data_emissao", ASCENDING), ("_id", ASCENDING)]),
+        ]
\ No newline at end of file
@@ -1,6 +1,8 @@
 from beanie import Document, Indexed
-from pydantic import Field
-from pymongo import TEXT
+from pydantic import Field, model_validator
+from pymongo import ASCENDING, TEXT, IndexModel
+
+from app.utils.busca import normalizar_busca
 
 class Produto(Document):
     nome: Indexed(str) # type: ignore
@@ -8,9 +10,34 @@ class Produto(Document):
     preco: float = Field(gt=0)
     categoria: str
     estoque: int = Field(default=0, ge=0)
+    sku: str | None = None  # código do ERP, chave das importações em lote
+    # Nome normalizado para a busca por prefixo (gravado no banco, fora das respostas)
+    nome_busca: str | None = Field(default=None, exclude=True)
+
+    @model_validator(mode="after")
+    def _preencher_nome_busca(self):
+        self.nome_busca = normalizar_busca(self.nome)
+        return self
 
     class Settings:
         name = "produtos"
         indexes = [
-            [("nome", TEXT), ("descricao", TEXT)],
-        ]
\ No newline at end of file
+            IndexModel(
+                [("nome", TEXT), ("descricao", TEXT)],
+                name="busca_texto",
+                default_language="portuguese",
+                weights={"nome": 10, "descricao": 2}
+            ),
+            IndexModel([("nome_busca", ASCENDING), ("_id", ASCENDING)], name="busca_prefixo"),
+            # Listagem: igualdade em categoria, depois a ordenação (preco ou _id) e o _id de desempate
+            IndexModel([("categoria", ASCENDING), ("preco", ASCENDING), ("_id", ASCENDING)], name="categoria_preco"),
+            IndexModel([("categoria", ASCENDING), ("_id", ASCENDING)], name="categoria_id"),
+            IndexModel([("preco", ASCENDING), ("_id", ASCENDING)], name="preco"),
+            # Único só entre produtos que têm SKU
+            IndexModel(
+                [("sku", ASCENDING)],
+                name="sku",
+                unique=True,
+                partialFilterExpression={"sku": {"$type": "string"}}
+            ),
+        ]
@@ -0,0 +1,41 @@
+from datetime import datetime
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+# Resumos (materialized views) mantidos incrementalmente para os endpoints de analytics
+
+class ResumoPedidosDia(Document):
+    """Total de pedidos e faturamento de um dia (todos os status)."""
+    dia: datetime
+    total_pedidos: int = 0
+    faturamento_total: float = 0.0
+
+    class Settings:
+        name = "resumo_pedidos_dia"
+        indexes = [
+            IndexModel([("dia", ASCENDING)], unique=True),
+        ]
+
+class ResumoVendasCategoria(Document):
+    """Vendas de uma categoria em um dia (pedidos não cancelados)."""
+    dia: datetime
+    categoria: str | None = None
+    total_vendido: float = 0.0
+    quantidade_itens: int = 0
+
+    class Settings:
+        name = "resumo_vendas_categoria"
+        indexes = [
+            IndexModel([("dia", ASCENDING), ("categoria", ASCENDING)], unique=True),
+        ]
+
+class ResumoProdutosCategoria(Document):
+    """Quantidade de produtos cadastrados em uma categoria."""
+    categoria: str
+    total_produtos: int = 0
+
+    class Settings:
+        name = "resumo_produtos_categoria"
+        indexes = [
+            IndexModel([("categoria", ASCENDING)], unique=True),
+        ]
@@ -0,0 +1,9 @@
+from beanie import Document
+
+class VersaoColecao(Document):
+    """Token que muda a cada escrita em uma coleção; base dos ETags das respostas HTTP."""
+    id: str  # nome da coleção
+    token: str
+
+    class Settings:
+        name = "versoes_colecoes"
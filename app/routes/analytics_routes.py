@@ -1,48 +1,72 @@
-from fastapi import APIRouter
-from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+import asyncio
 
+from app.core.config import settings
+from app.core.database import colecao_analytics
 from app.models.pedido import Pedido
 from app.models.produto import Produto
+from app.models.resumo import ResumoPedidosDia, ResumoVendasCategoria, ResumoProdutosCategoria
+from app.schemas.pedido import PaginatedResponse, PedidoPeriodoResponse
+from app.utils.consultas_pedido import filtro_periodo
+from app.utils.cache_http import cache_http
+from app.utils.paginacao import (
+    ModoContagem, contar, filtro_cursor, ordenacao, proximo_cursor, total_paginas
+)
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-@router.get("/produtos-por-categoria")
+# As leituras usam colecao_analytics: com ANALYTICS_READ_PREFERENCE=secondaryPreferred
+# os relatórios saem dos secundários e não disputam o primário com as compras
+
+def _cache_relatorio(colecao: str) -> list:
+    """
+    Os relatórios mudam só quando pedidos (ou produtos) mudam; clientes de BI podem guardar por 1 minuto.
+    Só vale lendo do primário: as versões vêm do primário, e um secundário atrasado
+    receberia o ETag novo para dados que ainda não tem.
+    """
+    if settings.ANALYTICS_READ_PREFERENCE != "primary":
+        return []
+    return [Depends(cache_http(colecao, max_age=60))]
+
+cache_pedidos = _cache_relatorio(Pedido.Settings.name)
+cache_produtos = _cache_relatorio(Produto.Settings.name)
+
+@router.get("/produtos-por-categoria", dependencies=cache_produtos)
 async def contar_produtos_por_categoria():
-    """Retorna a quantidade de produtos por categoria."""
-    pipeline = [
-        {"$group": {"_id": "$categoria", "total_produtos": {"$sum": 1}}},
-        {"$project": {"categoria": "$_id", "total_produtos": 1, "_id": 0}},
-        {"$sort": {"total_produtos": -1}}
-    ]
-    
-    collection = Produto.get_pymongo_collection()
-    cursor = collection.aggregate(pipeline)
+    """Retorna a quantidade de produtos por categoria (lida do resumo mantido a cada escrita)."""
+    collection = colecao_analytics(ResumoProdutosCategoria)
+    cursor = collection.find(
+        {"total_produtos": {"$gt": 0}},
+        {"_id": 0, "categoria": 1, "total_produtos": 1}
+    ).sort("total_produtos", -1)
     resultado = await cursor.to_list(length=None)
     return resultado
 
-@router.get("/ticket-medio")
+@router.get("/ticket-medio", dependencies=cache_pedidos)
 async def calcular_ticket_medio():
-    """Calcula o ticket médio dos pedidos."""
+    """Calcula o ticket médio dos pedidos a partir dos resumos diários."""
     pipeline = [
         {
             "$group": {
-                "_id": None, 
-                "media_valor": {"$avg": "$valor_total"},
-                "total_pedidos": {"$sum": 1},
-                "faturamento_total": {"$sum": "$valor_total"}
+                "_id": None,
+                "total_pedidos": {"$sum": "$total_pedidos"},
+                "faturamento_total": {"$sum": "$faturamento_total"}
             }
         },
+        {"$match": {"total_pedidos": {"$gt": 0}}},
         {
             "$project": {
                 "_id": 0,
-                "ticket_medio": {"$round": ["$media_valor", 2]},
+                "ticket_medio": {
+                    "$round": [{"$divide": ["$faturamento_total", "$total_pedidos"]}, 2]
+                },
                 "total_pedidos": 1,
-                "faturamento_total": 1
+                "faturamento_total": {"$round": ["$faturamento_total", 2]}
             }
         }
     ]
     
-    collection = Pedido.get_pymongo_collection()
+    collection = colecao_analytics(ResumoPedidosDia)
     cursor = collection.aggregate(pipeline)
     resultado = await cursor.to_list(length=None)
     
@@ -51,68 +75,88 @@ async def calcular_ticket_medio():
         
     return resultado[0]
 
-@router.get("/pedidos-por-periodo")
-async def listar_pedidos_por_data(ano: int, mes: int | None = None):
-    """Lista pedidos filtrados por ano e opcionalmente por mês."""
-    match_stage = {
-        "$match": {
-            "$expr": {
-                "$and": [{"$eq": [{"$year": "$data_emissao"}, ano]}]
-            }
-        }
+@router.get(
+    "/pedidos-por-periodo",
+    response_model=PaginatedResponse[PedidoPeriodoResponse],
+    dependencies=cache_pedidos
+)
+async def listar_pedidos_por_data(
+    ano: int = Query(..., ge=1, le=9998, description="Ano de emissão"),
+    mes: int | None = Query(None, ge=1, le=12, description="Mês de emissão (opcional)"),
+    fuso: str = Query("UTC", description="Fuso horário IANA usado para os limites do período (ex.: America/Sao_Paulo)"),
+    page: int = Query(1, ge=1, description="Número da página"),
+    page_size: int = Query(50, ge=1, le=500, description="Itens por página"),
+    cursor: str | None = Query(None, description="Cursor da página seguinte (next_cursor); substitui page"),
+    count: ModoContagem = Query("exact", description="Total: exact (contagem), estimated (estimativa/cache) ou none")
+):
+    """Lista pedidos filtrados por ano e opcionalmente por mês, do mais recente ao mais antigo."""
+    # Intervalo semiaberto sobre data_emissao: usa o índice em vez de calcular $year/$month por documento
+    filtro = filtro_periodo(ano, mes, fuso)
+    filtro_pagina = {**filtro, **filtro_cursor(cursor, "data_emissao", -1)} if cursor else filtro
+
+    projecao = {
+        "data_emissao": 1,
+        "valor": "$valor_total",
+        "status": 1,
+        "cliente_id": {"$toString": "$cliente.$id"}
     }
 
-    if mes:
-        match_stage["$match"]["$expr"]["$and"].append(
-            {"$eq": [{"$month": "$data_emissao"}, mes]}
-        )
+    collection = colecao_analytics(Pedido)
+    busca = collection.find(filtro_pagina, projecao).sort(ordenacao("data_emissao", -1))
+    if not cursor:
+        busca = busca.skip((page - 1) * page_size)
 
-    pipeline = [
-        match_stage,
-        {"$sort": {"data_emissao": -1}},
+    (total_items, total_kind), pedidos = await asyncio.gather(
+        contar(Pedido, filtro, count, collection),
+        busca.limit(page_size + 1).to_list(length=None)
+    )
+    next_cursor = proximo_cursor(pedidos, page_size, "data_emissao")
+
+    itens = [
         {
-            "$project": {
-                "id": {"$toString": "$_id"},
-                "data": "$data_emissao",
-                "valor": "$valor_total",
-                "status": "$status",
-                "cliente_id": "$cliente.$id"
-            }
+            "id": str(pedido["_id"]),
+            "data": pedido["data_emissao"],
+            "valor": pedido["valor"],
+            "status": pedido["status"],
+            "cliente_id": pedido.get("cliente_id")
         }
+        for pedido in pedidos[:page_size]
     ]
 
-    collection = Pedido.get_pymongo_collection()
-    cursor = collection.aggregate(pipeline)
-    resultado = await cursor.to_list(length=None)
-    return resultado
+    return PaginatedResponse(
+        items=itens,
+        page=None if cursor else page,
+        page_size=page_size,
+        total_items=total_items,
+        total_pages=total_paginas(total_items, page_size),
+        total_kind=total_kind,
+        next_cursor=next_cursor
+    )
 
-@router.get("/vendas-por-categoria")
+@router.get("/vendas-por-categoria", dependencies=cache_pedidos)
 async def relatorio_vendas_por_categoria():
-    """Retorna o total vendido agrupado por categoria de produto."""
+    """Retorna o total vendido agrupado por categoria de produto (a partir dos resumos diários)."""
     pipeline = [
-        {"$match": {"status": {"$ne": "CANCELADO"}}},
-        {"$unwind": "$itens"},
         {
             "$group": {
-                "_id": "$itens.produto.categoria",
-                "total_vendido": {
-                    "$sum": {"$multiply": ["$itens.quantidade", "$itens.preco_unitario"]}
-                },
-                "quantidade_itens": {"$sum": "$itens.quantidade"}
+                "_id": "$categoria",
+                "total_vendido": {"$sum": "$total_vendido"},
+                "quantidade_itens": {"$sum": "$quantidade_itens"}
             }
         },
+        {"$match": {"quantidade_itens": {"$gt": 0}}},
         {"$sort": {"total_vendido": -1}},
         {
             "$project": {
                 "_id": 0,
                 "categoria": "$_id",
-                "total_vendido": 1,
+                "total_vendido": {"$round": ["$total_vendido", 2]},
                 "quantidade_itens": 1
             }
         }
     ]
 
-    collection = Pedido.get_pymongo_collection()
+    collection = colecao_analytics(ResumoVendasCategoria)
     cursor = collection.aggregate(pipeline)
     resultado = await cursor.to_list(length=None)
     return resultado
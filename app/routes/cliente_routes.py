@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from beanie import PydanticObjectId
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
-import math
+import asyncio
 
+from app.core.cache import cache
 from app.models.cliente import Cliente
 from app.schemas.cliente import ClienteCreate, ClienteResponse, ClienteUpdate
 from app.schemas.pedido import PaginatedResponse
+from app.schemas.importacao import ResultadoImportacao
+from app.schemas.lote import BuscaLote, LoteResponse
+from app.utils.campos import campos_resposta, projetar, resposta_parcial
+from app.utils.consultas_pedido import PROJECAO_CLIENTE
+from app.utils.importacao import corpo_importacao, importar
+from app.utils.paginacao import (
+    ModoContagem, contar, filtro_cursor, ordenacao, proximo_cursor, total_paginas
+)
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
@@ -27,34 +37,74 @@ async def criar_cliente(dados: ClienteCreate):
     
     return novo_cliente
 
+def _atualizacao_importacao(item: ClienteCreate) -> dict:
+    """Upsert de uma linha pelo CPF; email duplicado é recusado pelo índice único."""
+    enviados = item.model_dump(exclude_unset=True, exclude={"cpf"})
+    atualizacao = {"$set": enviados}
+    if "endereco" not in enviados:
+        atualizacao["$setOnInsert"] = {"endereco": None}
+    return atualizacao
+
+@router.post("/bulk", response_model=ResultadoImportacao, openapi_extra=corpo_importacao(ClienteCreate))
+async def importar_clientes(request: Request):
+    """
+    Cria ou atualiza clientes em lote pelo CPF.
+    Aceita um array JSON ou NDJSON (Content-Type: application/x-ndjson), uma linha por cliente.
+    Devolve o resultado de cada linha; erros em uma linha não impedem as demais.
+    """
+    return await importar(request, Cliente, ClienteCreate, "cpf", _atualizacao_importacao)
+
+@router.post("/batch-get", response_model=LoteResponse[ClienteResponse])
+async def buscar_clientes_por_ids(dados: BuscaLote):
+    """Busca vários clientes pelo ID em uma chamada, na ordem pedida; lista os IDs que não existem."""
+    ids = list(dict.fromkeys(dados.ids))
+    # Os que não estão no cache vêm do banco em uma única consulta $in
+    clientes = await cache.obter_varios(Cliente, ids)
+    return LoteResponse(
+        items=[clientes[id] for id in ids if id in clientes],
+        nao_encontrados=[id for id in ids if id not in clientes]
+    )
+
 @router.get("/", response_model=PaginatedResponse[ClienteResponse])
 async def listar_clientes(
+    response: Response,
     page: int = Query(1, ge=1, description="Número da página"),
-    page_size: int = Query(10, ge=1, le=100, description="Itens por página")
+    page_size: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: str | None = Query(None, description="Cursor da página seguinte (next_cursor); substitui page"),
+    count: ModoContagem = Query("exact", description="Total: exact (contagem), estimated (estimativa/cache) ou none"),
+    campos: set[str] | None = Depends(campos_resposta(ClienteResponse))
 ):
-    """Retorna todos os clientes cadastrados com paginação."""
-    # Conta total de documentos
-    total_items = await Cliente.count()
-    total_pages = math.ceil(total_items / page_size) if total_items > 0 else 1
+    """Retorna todos os clientes cadastrados com paginação (por página ou por cursor)."""
+    # Com cursor a página continua de onde a anterior parou (keyset); sem ele, usa skip
+    filtro_pagina = filtro_cursor(cursor) if cursor else {}
+    skip = 0 if cursor else (page - 1) * page_size
     
-    # Calcula o skip para a paginação
-    skip = (page - 1) * page_size
+    # Projetados no formato de ClienteResponse (só os campos de fields): uma única validação, sem montar o Document
+    query = Cliente.get_motor_collection().find(filtro_pagina, projetar(PROJECAO_CLIENTE, campos))
     
-    # Busca clientes com paginação
-    clientes = await Cliente.find_all().skip(skip).limit(page_size).to_list()
+    # Contagem e página rodam em paralelo; busca um item a mais só para saber se existe próxima página
+    (total_items, total_kind), clientes = await asyncio.gather(
+        contar(Cliente, {}, count),
+        query.sort(ordenacao()).skip(skip).limit(page_size + 1).to_list(length=None)
+    )
+    next_cursor = proximo_cursor(clientes, page_size)
     
-    return PaginatedResponse(
-        items=clientes,
-        page=page,
+    pagina = PaginatedResponse(
+        items=clientes[:page_size],
+        page=None if cursor else page,
         page_size=page_size,
         total_items=total_items,
-        total_pages=total_pages
+        total_pages=total_paginas(total_items, page_size),
+        total_kind=total_kind,
+        next_cursor=next_cursor
     )
+    # Com fields= a resposta traz objetos parciais, só com os campos projetados
+    return resposta_parcial(pagina, ClienteResponse, campos, response) if campos else pagina
 
 @router.get("/{id}", response_model=ClienteResponse)
 async def obter_cliente(id: PydanticObjectId):
     """Busca um cliente pelo ID."""
-    cliente = await Cliente.get(id)
+    cliente = await cache.obter(Cliente, id)
     if not cliente:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     return cliente
@@ -62,21 +112,33 @@ async def obter_cliente(id: PydanticObjectId):
 @router.put("/{id}", response_model=ClienteResponse)
 async def atualizar_cliente(id: PydanticObjectId, dados: ClienteUpdate):
     """Atualiza dados do cliente. Aceita atualização parcial."""
-    cliente = await Cliente.get(id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    # null só limpa o endereço; nos campos obrigatórios é ignorado (o $set é gravado sem passar pelo modelo)
+    dados_para_atualizar = {
+        campo: valor for campo, valor in dados.model_dump(exclude_unset=True).items()
+        if valor is not None or campo == "endereco"
+    }
+    if not dados_para_atualizar:
+        cliente = await cache.obter(Cliente, id)
+        if not cliente:
+            raise HTTPException(status_code=404, detail="Cliente não encontrado")
+        return cliente
 
-    dados_para_atualizar = dados.model_dump(exclude_unset=True)
-    await cliente.set(dados_para_atualizar)
+    # Uma única operação: atualiza e devolve o documento já atualizado
+    atualizado = await Cliente.get_motor_collection().find_one_and_update(
+        {"_id": id}, {"$set": dados_para_atualizar}, return_document=ReturnDocument.AFTER
+    )
+    if atualizado is None:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
-    return cliente
+    await cache.invalidar(Cliente, id)
+    return Cliente.model_validate(atualizado)
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_cliente(id: PydanticObjectId):
     """Remove um cliente do banco."""
-    cliente = await Cliente.get(id)
-    if not cliente:
+    resultado = await Cliente.get_motor_collection().delete_one({"_id": id})
+    if resultado.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     
-    await cliente.delete()
+    await cache.invalidar(Cliente, id)
     return None
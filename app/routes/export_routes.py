@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Query
+from beanie import PydanticObjectId
+
+from app.core.config import settings
+from app.core.database import colecao_analytics
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.utils.busca import ModoBusca
+from app.utils.consultas_pedido import filtro_periodo, pipeline_exportacao
+from app.utils.consultas_produto import OrdemProdutos, filtro_produtos, ordenacao_produtos
+from app.utils.exportacao import FormatoExportacao, resposta_exportacao
+from app.utils.paginacao import ordenacao
+
+router = APIRouter(prefix="/export", tags=["Exportação"])
+
+# Exportações são leituras longas de BI: seguem as opções de leitura de analytics
+
+COLUNAS_PRODUTO = ["id", "sku", "nome", "descricao", "preco", "categoria", "estoque"]
+COLUNAS_CLIENTE = [
+    "id", "nome", "email", "cpf",
+    "endereco.rua", "endereco.numero", "endereco.bairro", "endereco.cidade", "endereco.estado", "endereco.cep",
+]
+# No CSV, cada item do pedido vira uma linha com os dados do pedido repetidos
+COLUNAS_PEDIDO = [
+    "id", "data_emissao", "status", "valor_total", "cliente_id",
+    "produto_id", "nome", "categoria", "quantidade", "preco_unitario",
+]
+
+
+def _linhas_pedido(pedido: dict) -> list[dict]:
+    """Expande o pedido em uma linha por item para o CSV."""
+    cabecalho = {chave: valor for chave, valor in pedido.items() if chave != "itens"}
+    return [{**cabecalho, **item} for item in pedido["itens"]]
+
+
+@router.get("/produtos")
+async def exportar_produtos(
+    formato: FormatoExportacao = Query("ndjson", description="ndjson ou csv"),
+    termo: str | None = Query(None, description="Busca por nome e descrição"),
+    busca: ModoBusca = Query("texto", description="texto: relevância em nome/descrição | prefixo: início do nome"),
+    categoria: str | None = Query(None, description="Filtro por categoria"),
+    min_preco: float | None = Query(None, description="Preço mínimo", gt=0),
+    max_preco: float | None = Query(None, description="Preço máximo", gt=0),
+    ordenar: OrdemProdutos = Query("id", description="Ordem sem termo de busca: id (cadastro) ou preco")
+):
+    """Exporta os produtos (com os mesmos filtros da listagem) em streaming."""
+    filtro = filtro_produtos(termo, busca, categoria, min_preco, max_preco)
+    ordem, _ = ordenacao_produtos(termo, busca, ordenar)
+
+    cursor = colecao_analytics(Produto).find(
+        filtro, {"nome_busca": 0, "reservas": 0, "revision_id": 0}, batch_size=settings.EXPORT_BATCH_SIZE
+    ).sort(ordem)
+    return resposta_exportacao(cursor, formato, "produtos", COLUNAS_PRODUTO)
+
+
+@router.get("/clientes")
+async def exportar_clientes(
+    formato: FormatoExportacao = Query("ndjson", description="ndjson ou csv")
+):
+    """Exporta todos os clientes em streaming."""
+    cursor = colecao_analytics(Cliente).find(
+        {}, {"revision_id": 0}, batch_size=settings.EXPORT_BATCH_SIZE
+    ).sort(ordenacao())
+    return resposta_exportacao(cursor, formato, "clientes", COLUNAS_CLIENTE)
+
+
+@router.get("/pedidos")
+async def exportar_pedidos(
+    formato: FormatoExportacao = Query("ndjson", description="ndjson ou csv (uma linha por item)"),
+    cliente_id: PydanticObjectId | None = Query(None, description="Somente pedidos deste cliente"),
+    ano: int | None = Query(None, ge=1, le=9998, description="Ano de emissão"),
+    mes: int | None = Query(None, ge=1, le=12, description="Mês de emissão (exige ano)"),
+    fuso: str = Query("UTC", description="Fuso horário IANA usado para os limites do período")
+):
+    """Exporta os pedidos, do mais antigo ao mais recente, em streaming."""
+    if mes and not ano:
+        raise HTTPException(status_code=400, detail="Informe o ano junto com o mês")
+
+    filtro = {}
+    if cliente_id:
+        filtro["cliente.$id"] = cliente_id
+    if ano:
+        filtro.update(filtro_periodo(ano, mes, fuso))
+
+    # Os índices (data_emissao, _id) e (cliente, data_emissao, _id) são percorridos de trás para frente
+    cursor = colecao_analytics(Pedido).aggregate(
+        pipeline_exportacao(filtro, ordenacao("data_emissao")),
+        batchSize=settings.EXPORT_BATCH_SIZE
+    )
+    return resposta_exportacao(cursor, formato, "pedidos", COLUNAS_PEDIDO, _linhas_pedido)
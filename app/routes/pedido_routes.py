@@ -1,83 +1,198 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from beanie import PydanticObjectId, WriteRules
-import math
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from beanie import Link, PydanticObjectId
+from beanie.odm.utils.encoder import Encoder
+from pymongo import ReturnDocument
+import asyncio
 
-from app.models.pedido import Pedido, ItemPedido
+from app.core.cache import cache
+from app.models.pedido import Pedido, ItemPedido, StatusPedido
 from app.models.cliente import Cliente
 from app.models.produto import Produto
-from app.schemas.pedido import PedidoCreate, PedidoResponse, PedidoUpdate, PaginatedResponse
+from app.schemas.pedido import (
+    ItemPedidoCreate, PedidoCreate, PedidoResponse, PedidoUpdate, PaginatedResponse
+)
+from app.utils.campos import campos_resposta, resposta_parcial
+from app.utils.ciclo_pedido import ciclo
+from app.utils.consultas_pedido import buscar_pedido, buscar_pedidos
+from app.utils.estoque import (
+    _id_produto, escrever_com_estoque, gravar_com_estoque, quantidades_reservadas, variacao
+)
+from app.utils.resumos import atualizar_resumos, contribuicao
+from app.utils.cache_http import registrar_alteracao
+from app.utils.paginacao import (
+    ModoContagem, contar, filtro_cursor, ordenacao, proximo_cursor, total_paginas
+)
 
 router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
 
-@router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
-async def criar_pedido(dados: PedidoCreate):
-    """Cria um novo pedido para um cliente."""
-    cliente = await Cliente.get(dados.cliente_id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+def _agrupar_quantidades(itens_input: list[ItemPedidoCreate]) -> dict[PydanticObjectId, int]:
+    """Soma as quantidades de linhas repetidas do mesmo produto, mantendo a ordem do carrinho."""
+    quantidades: dict[PydanticObjectId, int] = {}
+    for item_input in itens_input:
+        quantidades[item_input.produto_id] = quantidades.get(item_input.produto_id, 0) + item_input.quantidade
+    return quantidades
+
+
+async def _buscar_produtos(ids: list[PydanticObjectId]) -> dict[PydanticObjectId, Produto]:
+    """Busca os produtos do carrinho no cache; os que faltam vêm em uma única consulta $in."""
+    return await cache.obter_varios(Produto, ids)
+
+
+def _precificar_itens(
+    quantidades: dict[PydanticObjectId, int],
+    produtos_por_id: dict[PydanticObjectId, Produto]
+) -> tuple[list[ItemPedido], float]:
+    """Monta os itens do pedido com o preço atual de cada produto e calcula o valor total."""
+    faltando = [str(produto_id) for produto_id in quantidades if produto_id not in produtos_por_id]
+    if faltando:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Produtos não encontrados: {', '.join(faltando)}"
+        )
 
     itens_processados = []
     valor_total_calculado = 0.0
 
-    for item_input in dados.itens:
-        produto_db = await Produto.get(item_input.produto_id)
-        
-        if not produto_db:
-            raise HTTPException(status_code=404, detail=f"Produto {item_input.produto_id} não encontrado")
+    for produto_id, quantidade in quantidades.items():
+        produto_db = produtos_por_id[produto_id]
 
+        # O item guarda só a referência ao produto, mais a cópia de nome e categoria
         novo_item = ItemPedido(
-            produto=produto_db,
-            quantidade=item_input.quantidade,
+            produto=produto_db.to_ref(),
+            nome=produto_db.nome,
+            categoria=produto_db.categoria,
+            quantidade=quantidade,
             preco_unitario=produto_db.preco
         )
-        
+
         itens_processados.append(novo_item)
-        valor_total_calculado += (produto_db.preco * item_input.quantidade)
+        valor_total_calculado += (produto_db.preco * quantidade)
+
+    return itens_processados, valor_total_calculado
+
+
+def _produto_do_item(item: ItemPedido, produtos_por_id: dict[PydanticObjectId, Produto]) -> dict | None:
+    """Produto do item para a resposta: o carregado pelo ID ou, em pedidos antigos, o embutido."""
+    if not isinstance(item.produto, Link):
+        return item.produto.model_dump()
+    produto = produtos_por_id.get(item.produto.ref.id)
+    return produto.model_dump() if produto else None
+
+
+def _resposta_pedido(
+    pedido: Pedido,
+    cliente: Cliente | None,
+    produtos_por_id: dict[PydanticObjectId, Produto]
+) -> dict:
+    """Monta a resposta do pedido com os documentos já carregados, sem nova consulta."""
+    return {
+        "id": pedido.id,
+        "data_emissao": pedido.data_emissao,
+        "status": pedido.status,
+        "valor_total": pedido.valor_total,
+        "cliente": cliente.model_dump() if cliente else None,
+        "itens": [
+            {
+                "produto": _produto_do_item(item, produtos_por_id),
+                "nome": item.nome,
+                "categoria": item.categoria,
+                "quantidade": item.quantidade,
+                "preco_unitario": item.preco_unitario
+            }
+            for item in pedido.itens
+        ]
+    }
+
+
+@router.post("/", response_model=PedidoResponse, status_code=status.HTTP_201_CREATED)
+async def criar_pedido(dados: PedidoCreate):
+    """Cria um novo pedido para um cliente."""
+    quantidades = _agrupar_quantidades(dados.itens)
+
+    # Cliente e produtos são buscados ao mesmo tempo (2 consultas, independente do tamanho do carrinho)
+    cliente, produtos_por_id = await asyncio.gather(
+        cache.obter(Cliente, dados.cliente_id),
+        _buscar_produtos(list(quantidades))
+    )
+    if not cliente:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+
+    itens_processados, valor_total_calculado = _precificar_itens(quantidades, produtos_por_id)
 
     novo_pedido = Pedido(
         cliente=cliente,
         itens=itens_processados,
         valor_total=valor_total_calculado,
-        status="PENDENTE"
+        status=StatusPedido.PENDENTE,
+        controla_estoque=True
     )
 
-    await novo_pedido.insert(link_rule=WriteRules.WRITE)
+    # O saldo não é conferido no produto em cache (pode estar defasado em outro worker):
+    # quem decide é o $inc condicional, e o 409 lista os produtos que ele recusou.
+    # Baixa de estoque de todas as linhas + inserção do pedido como uma unidade.
+    # Cliente e produtos já existem no banco: não há por que regravá-los junto com o pedido
+    await gravar_com_estoque(
+        quantidades_reservadas(novo_pedido),
+        lambda sessao: novo_pedido.insert(session=sessao)
+    )
+    # A versão dos pedidos só muda com os resumos já gravados (os relatórios leem deles)
+    await atualizar_resumos(None, contribuicao(novo_pedido))
+    await registrar_alteracao(Pedido.Settings.name)
     
-    # O pedido já tem os objetos carregados, retorna diretamente
-    return novo_pedido
+    # Cliente e produtos já estão carregados, então a resposta é montada sem reler o pedido
+    return _resposta_pedido(novo_pedido, cliente, produtos_por_id)
 
 
 @router.get("/", response_model=PaginatedResponse[PedidoResponse])
 async def listar_pedidos(
+    response: Response,
     page: int = Query(1, ge=1, description="Número da página"),
-    page_size: int = Query(10, ge=1, le=100, description="Itens por página")
+    page_size: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: str | None = Query(None, description="Cursor da página seguinte (next_cursor); substitui page"),
+    count: ModoContagem = Query("exact", description="Total: exact (contagem), estimated (estimativa/cache) ou none"),
+    status_pedido: StatusPedido | None = Query(
+        None, alias="status", description="Somente pedidos neste status, do mais antigo ao mais recente"
+    ),
+    campos: set[str] | None = Depends(campos_resposta(PedidoResponse))
 ):
-    """Lista todos os pedidos com paginação e eager loading dos relacionamentos."""
-    # Conta total de documentos
-    total_items = await Pedido.count()
-    total_pages = math.ceil(total_items / page_size) if total_items > 0 else 1
+    """Lista todos os pedidos com paginação (por página ou por cursor) e eager loading dos relacionamentos."""
+    # Filtrado por status vira uma fila (mais antigo primeiro) sobre o índice (status, data_emissao, _id)
+    filtro = {"status": status_pedido.value} if status_pedido else {}
+    campo = "data_emissao" if status_pedido else None
     
-    # Calcula o skip para a paginação
-    skip = (page - 1) * page_size
+    # Com cursor a página continua de onde a anterior parou (keyset); sem ele, usa skip
+    filtro_pagina = {**filtro, **filtro_cursor(cursor, campo)} if cursor else filtro
+    skip = 0 if cursor else (page - 1) * page_size
     
-    # Busca pedidos com paginação e fetch_links=True para eager loading
-    pedidos = await Pedido.find_all(fetch_links=True).skip(skip).limit(page_size).to_list()
+    # Com fields= só os campos pedidos são projetados (mais o do cursor); sem cliente/itens não há $lookup
+    campos_consulta = campos | {campo} if campos and campo else campos
     
-    return PaginatedResponse(
-        items=pedidos,
-        page=page,
+    # Contagem e página rodam em paralelo; busca um item a mais só para saber se existe próxima página
+    (total_items, total_kind), pedidos = await asyncio.gather(
+        contar(Pedido, filtro, count),
+        buscar_pedidos(filtro_pagina, ordenacao(campo), skip, page_size + 1, campos_consulta)
+    )
+    next_cursor = proximo_cursor(pedidos, page_size, campo)
+    
+    pagina = PaginatedResponse(
+        items=pedidos[:page_size],
+        page=None if cursor else page,
         page_size=page_size,
         total_items=total_items,
-        total_pages=total_pages
+        total_pages=total_paginas(total_items, page_size),
+        total_kind=total_kind,
+        next_cursor=next_cursor
     )
+    # Com fields= a resposta traz objetos parciais, só com os campos pedidos
+    return resposta_parcial(pagina, PedidoResponse, campos, response) if campos else pagina
 
 
 @router.get("/{id}", response_model=PedidoResponse)
 async def obter_pedido(id: PydanticObjectId):
     """Obtém um pedido pelo ID com eager loading dos relacionamentos."""
-    # Usa fetch_links=True para carregar cliente e produtos automaticamente
-    pedido = await Pedido.get(id, fetch_links=True)
+    # Uma agregação traz cliente e produtos já no formato da resposta
+    pedido = await buscar_pedido(id)
     
     if not pedido:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
@@ -89,91 +204,124 @@ async def obter_pedido(id: PydanticObjectId):
 async def listar_pedidos_por_cliente(
     cliente_id: PydanticObjectId,
     page: int = Query(1, ge=1, description="Número da página"),
-    page_size: int = Query(10, ge=1, le=100, description="Itens por página")
+    page_size: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: str | None = Query(None, description="Cursor da página seguinte (next_cursor); substitui page"),
+    count: ModoContagem = Query("exact", description="Total: exact (contagem), estimated (estimativa/cache) ou none")
 ):
-    """Lista todos os pedidos de um cliente específico com paginação e eager loading."""
-    cliente = await Cliente.get(cliente_id)
-    if not cliente:
-        raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    
-    # Conta total de pedidos do cliente
-    total_items = await Pedido.find(Pedido.cliente.id == cliente_id).count()
-    total_pages = math.ceil(total_items / page_size) if total_items > 0 else 1
+    """Lista os pedidos de um cliente, do mais recente ao mais antigo, com paginação (por página ou por cursor) e eager loading."""
+    # Filtro direto sobre o DBRef gravado no pedido; usa o índice (cliente, data_emissao, _id)
+    filtro = {"cliente.$id": cliente_id}
     
-    # Calcula o skip para a paginação
-    skip = (page - 1) * page_size
+    # Com cursor a página continua de onde a anterior parou (keyset); sem ele, usa skip
+    filtro_pagina = {**filtro, **filtro_cursor(cursor, "data_emissao", -1)} if cursor else filtro
+    skip = 0 if cursor else (page - 1) * page_size
     
-    # Busca com paginação e fetch_links=True para eager loading
-    pedidos = await Pedido.find(
-        Pedido.cliente.id == cliente_id,
-        fetch_links=True
-    ).skip(skip).limit(page_size).to_list()
+    # Cliente, contagem e página rodam em paralelo; busca um item a mais só para saber se existe próxima página
+    cliente, (total_items, total_kind), pedidos = await asyncio.gather(
+        cache.obter(Cliente, cliente_id),
+        contar(Pedido, filtro, count),
+        buscar_pedidos(filtro_pagina, ordenacao("data_emissao", -1), skip, page_size + 1)
+    )
+    if not cliente:
+        raise HTTPException(status_code=404, detail="Cliente não encontrado")
+    next_cursor = proximo_cursor(pedidos, page_size, "data_emissao")
     
     return PaginatedResponse(
-        items=pedidos,
-        page=page,
+        items=pedidos[:page_size],
+        page=None if cursor else page,
         page_size=page_size,
         total_items=total_items,
-        total_pages=total_pages
+        total_pages=total_paginas(total_items, page_size),
+        total_kind=total_kind,
+        next_cursor=next_cursor
     )
 
 
 @router.put("/{id}", response_model=PedidoResponse)
 async def atualizar_pedido(id: PydanticObjectId, dados: PedidoUpdate):
-    """Atualiza um pedido existente (status e/ou itens)."""
-    pedido = await Pedido.get(id)
-    if not pedido:
-        raise HTTPException(status_code=404, detail="Pedido não encontrado")
+    """Atualiza um pedido existente (status e/ou itens) em uma única operação atômica."""
+    atualizacao = {}
+    troca_itens = dados.itens is not None
     
-    # Atualiza o status se fornecido
+    # O status só muda por uma transição declarada no ciclo do pedido
     if dados.status is not None:
-        status_validos = ["PENDENTE", "PROCESSANDO", "ENVIADO", "ENTREGUE", "CANCELADO"]
-        if dados.status.upper() not in status_validos:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Status inválido. Valores permitidos: {status_validos}"
-            )
-        pedido.status = dados.status.upper()
-    
-    # Atualiza os itens se fornecidos
-    if dados.itens is not None:
-        itens_processados = []
-        valor_total_calculado = 0.0
-        
-        for item_input in dados.itens:
-            produto_db = await Produto.get(item_input.produto_id)
-            
-            if not produto_db:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Produto {item_input.produto_id} não encontrado"
-                )
-            
-            novo_item = ItemPedido(
-                produto=produto_db,
-                quantidade=item_input.quantidade,
-                preco_unitario=produto_db.preco
-            )
-            
-            itens_processados.append(novo_item)
-            valor_total_calculado += (produto_db.preco * item_input.quantidade)
-        
-        pedido.itens = itens_processados
-        pedido.valor_total = valor_total_calculado
-    
-    await pedido.save(link_rule=WriteRules.WRITE)
-    
-    # Recarrega o pedido com fetch_links=True para eager loading
-    pedido_atualizado = await Pedido.get(id, fetch_links=True)
-    return pedido_atualizado
+        atualizacao["status"] = dados.status
+    
+    # Os novos itens dependem só dos produtos, então são precificados antes de tocar no pedido
+    produtos_por_id = {}
+    if troca_itens:
+        quantidades = _agrupar_quantidades(dados.itens)
+        produtos_por_id = await _buscar_produtos(list(quantidades))
+        itens_processados, valor_total_calculado = _precificar_itens(quantidades, produtos_por_id)
+        atualizacao["itens"] = itens_processados
+        atualizacao["valor_total"] = valor_total_calculado
+        # A partir da troca de itens o pedido passa a reservar estoque
+        atualizacao["controla_estoque"] = True
+    
+    colecao = Pedido.get_motor_collection()
+    alteracoes = Encoder(to_db=True).encode(atualizacao)
+    
+    async def _escrita(sessao):
+        if not alteracoes:
+            return await colecao.find_one({"_id": id}, session=sessao)
+        # Condicional ao status anterior: duas transições concorrentes não passam ao mesmo tempo
+        return await colecao.find_one_and_update(
+            {"_id": id, **ciclo.filtro(dados.status, troca_itens)},
+            {"$set": alteracoes},
+            return_document=ReturnDocument.BEFORE,
+            session=sessao
+        )
+    
+    def _variacao(documento: dict) -> dict:
+        # Cancelar devolve o estoque; trocar itens baixa/devolve só a diferença do que estava reservado
+        anterior = Pedido.model_validate(documento)
+        return variacao(
+            quantidades_reservadas(anterior),
+            quantidades_reservadas(anterior.model_copy(update=atualizacao))
+        )
+    
+    # Leitura e escrita em um só comando: o documento anterior vem da própria atualização
+    documento = await escrever_com_estoque(
+        _escrita, _variacao, lambda anterior: colecao.replace_one({"_id": id}, anterior)
+    )
+    if documento is None:
+        # Só no caminho de erro: distingue pedido inexistente de transição recusada
+        atual = await colecao.find_one({"_id": id}, {"status": 1})
+        if atual is None:
+            raise HTTPException(status_code=404, detail="Pedido não encontrado")
+        ciclo.rejeitar(atual["status"], dados.status, troca_itens)
+    
+    pedido_anterior = Pedido.model_validate(documento)
+    pedido = pedido_anterior.model_copy(update=atualizacao)
+    
+    # Cliente e produtos vêm do cache, então a resposta é montada sem reler o pedido
+    ids_itens = [
+        _id_produto(item) for item in pedido.itens
+        if isinstance(item.produto, Link) and _id_produto(item) not in produtos_por_id
+    ]
+    cliente, produtos_itens, _ = await asyncio.gather(
+        cache.obter(Cliente, pedido.cliente.ref.id),
+        cache.obter_varios(Produto, ids_itens),
+        atualizar_resumos(contribuicao(pedido_anterior), contribuicao(pedido))
+    )
+    await registrar_alteracao(Pedido.Settings.name)
+    return _resposta_pedido(pedido, cliente, {**produtos_por_id, **produtos_itens})
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_pedido(id: PydanticObjectId):
     """Remove um pedido do banco."""
-    pedido = await Pedido.get(id)
-    if not pedido:
+    colecao = Pedido.get_motor_collection()
+    
+    # A remoção devolve o pedido removido; se ele estava ativo, o estoque reservado volta
+    removido = await escrever_com_estoque(
+        lambda sessao: colecao.find_one_and_delete({"_id": id}, session=sessao),
+        lambda documento: variacao(quantidades_reservadas(Pedido.model_validate(documento)), {}),
+        lambda documento: colecao.insert_one(documento)
+    )
+    if removido is None:
         raise HTTPException(status_code=404, detail="Pedido não encontrado")
     
-    await pedido.delete()
+    await atualizar_resumos(contribuicao(Pedido.model_validate(removido)), None)
+    await registrar_alteracao(Pedido.Settings.name)
     return None
@@ -1,9 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from app.core.cache import cache
 from app.models.produto import Produto
-from app.schemas.produto import ProdutoCreate, ProdutoUpdate
+from app.schemas.produto import ProdutoCatalogoResponse, ProdutoCreate, ProdutoImportacao, ProdutoUpdate
+from app.schemas.importacao import ResultadoImportacao
+from app.schemas.lote import BuscaLote, LoteResponse
 from app.schemas.pedido import PaginatedResponse
+from app.utils.resumos import atualizar_resumo_produtos, reconstruir_resumo_produtos
+from app.utils.importacao import corpo_importacao, importar
+from app.utils.cache_http import cache_http, registrar_alteracao
+from app.utils.busca import ModoBusca, normalizar_busca
+from app.utils.campos import campos_resposta, resposta_parcial
+from app.utils.consultas_produto import OrdemProdutos, filtro_produtos, ordenacao_produtos, projecao_produtos
+from app.utils.paginacao import (
+    ModoContagem, contar, filtro_cursor, proximo_cursor, total_paginas
+)
 from beanie import PydanticObjectId
-import math
+from pymongo import ReturnDocument
+import asyncio
 
 router = APIRouter(prefix="/produtos", tags=["Produtos"])
 
@@ -12,53 +25,113 @@ async def criar_produto(dados: ProdutoCreate):
     """Cria um novo produto."""
     novo_produto = Produto(**dados.model_dump())
     await novo_produto.insert()
+    # A versão do catálogo só muda depois do resumo: o ETag novo nunca cobre o resumo antigo
+    await atualizar_resumo_produtos(None, novo_produto.categoria)
+    await registrar_alteracao(Produto.Settings.name)
     return novo_produto
 
-@router.get("/", response_model=PaginatedResponse[Produto])
+def _atualizacao_importacao(item: ProdutoImportacao) -> dict:
+    """Upsert de uma linha: grava os campos enviados; os omitidos só recebem o padrão na criação."""
+    enviados = item.model_dump(exclude_unset=True, exclude={"sku"})
+    enviados["nome_busca"] = normalizar_busca(item.nome)
+    padroes = {k: v for k, v in item.model_dump(exclude={"sku"}).items() if k not in enviados}
+    atualizacao = {"$set": enviados}
+    if padroes:
+        atualizacao["$setOnInsert"] = padroes
+    return atualizacao
+
+@router.post("/bulk", response_model=ResultadoImportacao, openapi_extra=corpo_importacao(ProdutoImportacao))
+async def importar_produtos(request: Request):
+    """
+    Cria ou atualiza produtos em lote pelo SKU.
+    Aceita um array JSON ou NDJSON (Content-Type: application/x-ndjson), uma linha por produto.
+    Devolve o resultado de cada linha; erros em uma linha não impedem as demais.
+    """
+    resultado = await importar(request, Produto, ProdutoImportacao, "sku", _atualizacao_importacao)
+    if resultado.criados or resultado.atualizados:
+        await reconstruir_resumo_produtos()
+        await registrar_alteracao(Produto.Settings.name)
+    return resultado
+
+@router.post("/batch-get", response_model=LoteResponse[Produto])
+async def buscar_produtos_por_ids(dados: BuscaLote):
+    """
+    Busca vários produtos pelo ID (ex.: carrinho, lista de desejos) em uma chamada.
+    Devolve na ordem pedida e lista os IDs que não existem.
+    """
+    ids = list(dict.fromkeys(dados.ids))
+    # Os que não estão no cache vêm do banco em uma única consulta $in
+    produtos = await cache.obter_varios(Produto, ids)
+    return LoteResponse(
+        items=[produtos[id] for id in ids if id in produtos],
+        nao_encontrados=[id for id in ids if id not in produtos]
+    )
+
+@router.get(
+    "/",
+    response_model=PaginatedResponse[ProdutoCatalogoResponse],
+    dependencies=[Depends(cache_http(Produto.Settings.name, max_age=10))]
+)
 async def listar_produtos(
+    response: Response,
     page: int = Query(1, ge=1, description="Número da página"),
     page_size: int = Query(10, ge=1, le=100, description="Itens por página"),
-    termo: str | None = Query(None, description="Busca por nome"),
+    termo: str | None = Query(None, description="Busca por nome e descrição"),
+    busca: ModoBusca = Query("texto", description="texto: relevância em nome/descrição | prefixo: autocomplete pelo início do nome"),
     categoria: str | None = Query(None, description="Filtro por categoria"),
     min_preco: float | None = Query(None, description="Preço mínimo", gt=0),
-    max_preco: float | None = Query(None, description="Preço máximo", gt=0)
+    max_preco: float | None = Query(None, description="Preço máximo", gt=0),
+    ordenar: OrdemProdutos = Query("id", description="Ordem sem termo de busca: id (cadastro) ou preco"),
+    cursor: str | None = Query(None, description="Cursor da página seguinte (next_cursor); substitui page"),
+    count: ModoContagem = Query("exact", description="Total: exact (contagem), estimated (estimativa/cache) ou none"),
+    campos: set[str] | None = Depends(campos_resposta(ProdutoCatalogoResponse))
 ):
-    """Lista produtos com filtros opcionais e paginação."""
-    query = Produto.find_all()
-    
-    if termo:
-        query = query.find({"nome": {"$regex": termo, "$options": "i"}})
+    """Lista produtos com filtros opcionais e paginação (por página ou por cursor)."""
+    # Filtros e ordenação seguem os formatos cobertos pelos índices (ver plano_consultas)
+    filtro = filtro_produtos(termo, busca, categoria, min_preco, max_preco)
+    ordem, campo_cursor = ordenacao_produtos(termo, busca, ordenar)
     
-    if categoria:
-        query = query.find(Produto.categoria == categoria)
-
-    if min_preco:
-        query = query.find(Produto.preco >= min_preco)
+    # Com cursor a página continua de onde a anterior parou (keyset); sem ele, usa skip
+    if cursor:
+        if termo and busca == "texto":
+            raise HTTPException(status_code=400, detail="A busca por texto pagina apenas por page")
+        filtro_pagina, skip = {"$and": [filtro, filtro_cursor(cursor, campo_cursor)]}, 0
+    else:
+        filtro_pagina, skip = filtro, (page - 1) * page_size
     
-    if max_preco:
-        query = query.find(Produto.preco <= max_preco)
+    # Os documentos vêm projetados no formato da resposta e são validados uma única vez
+    # (em PaginatedResponse), sem montar um Document do Beanie por produto
+    query = Produto.get_motor_collection().find(filtro_pagina, projecao_produtos(campo_cursor, campos))
     
-    # Conta total de documentos que correspondem aos filtros
-    total_items = await query.count()
-    total_pages = math.ceil(total_items / page_size) if total_items > 0 else 1
-    
-    # Calcula o skip para a paginação
-    skip = (page - 1) * page_size
-    
-    # Aplica paginação
-    produtos = await query.skip(skip).limit(page_size).to_list()
+    # Contagem e página rodam em paralelo; busca um item a mais só para saber se existe próxima página
+    (total_items, total_kind), produtos = await asyncio.gather(
+        contar(Produto, filtro, count),
+        query.sort(ordem).skip(skip).limit(page_size + 1).to_list(length=None)
+    )
+    # A ordem por relevância não tem chave para keyset, então a busca por texto não gera cursor
+    next_cursor = None if termo and busca == "texto" else proximo_cursor(produtos, page_size, campo_cursor)
     
-    return PaginatedResponse(
-        items=produtos,
-        page=page,
+    pagina = PaginatedResponse(
+        items=produtos[:page_size],
+        page=None if cursor else page,
         page_size=page_size,
         total_items=total_items,
-        total_pages=total_pages
+        total_pages=total_paginas(total_items, page_size),
+        total_kind=total_kind,
+        next_cursor=next_cursor
     )
+    # Com fields= a resposta traz objetos parciais, só com os campos projetados
+    return resposta_parcial(pagina, ProdutoCatalogoResponse, campos, response) if campos else pagina
 
-@router.get("/{id}", response_model=Produto)
+@router.get(
+    "/{id}",
+    response_model=Produto,
+    dependencies=[Depends(cache_http(Produto.Settings.name, max_age=10))]
+)
 async def obter_produto(id: PydanticObjectId):
     """Busca um produto pelo ID."""
+    # Lido do banco, não do cache do worker: o ETag vem da versão atual da coleção, e um
+    # documento defasado no cache seria servido (e revalidado com 304) como se fosse o atual
     produto = await Produto.get(id)
     if not produto:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
@@ -66,21 +139,44 @@ async def obter_produto(id: PydanticObjectId):
 
 @router.put("/{id}", response_model=Produto)
 async def atualizar_produto(id: PydanticObjectId, dados: ProdutoUpdate):
-    """Atualiza um produto."""
-    produto = await Produto.get(id)
-    if not produto:
+    """Atualiza um produto em uma única operação atômica."""
+    atualizacao = {k: v for k, v in dados.model_dump().items() if v is not None}
+    if not atualizacao:
+        produto = await cache.obter(Produto, id)
+        if not produto:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+        return produto
+    if "nome" in atualizacao:
+        atualizacao["nome_busca"] = normalizar_busca(atualizacao["nome"])
+    
+    # BEFORE porque o resumo precisa da categoria anterior; o documento novo é o anterior com o $set
+    anterior = await Produto.get_motor_collection().find_one_and_update(
+        {"_id": id}, {"$set": atualizacao}, return_document=ReturnDocument.BEFORE
+    )
+    if anterior is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
-    atualizacao = {k: v for k, v in dados.model_dump().items() if v is not None}
-    await produto.update({"$set": atualizacao})
-    return produto
+    # Cache, resumo e versão do catálogo são atualizados antes de montar a resposta;
+    # a versão por último, depois que tudo o que ela identifica já foi gravado
+    await asyncio.gather(
+        cache.invalidar(Produto, id),
+        atualizar_resumo_produtos(anterior["categoria"], atualizacao.get("categoria", anterior["categoria"]))
+    )
+    await registrar_alteracao(Produto.Settings.name)
+    return Produto.model_validate({**anterior, **atualizacao})
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def deletar_produto(id: PydanticObjectId):
     """Remove um produto."""
-    produto = await Produto.get(id)
-    if not produto:
+    removido = await Produto.get_motor_collection().find_one_and_delete(
+        {"_id": id}, projection={"categoria": 1}
+    )
+    if removido is None:
         raise HTTPException(status_code=404, detail="Produto não encontrado")
     
-    await produto.delete()
-    return None
\ No newline at end of file
+    await asyncio.gather(
+        cache.invalidar(Produto, id),
+        atualizar_resumo_produtos(removido["categoria"], None)
+    )
+    await registrar_alteracao(Produto.Settings.name)
+    return None
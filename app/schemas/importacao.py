@@ -0,0 +1,19 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+# --- OUTPUTS das importações em lote (POST /produtos/bulk e /clientes/bulk) ---
+
+class ResultadoLinha(BaseModel):
+    linha: int
+    chave: str | None = None
+    status: Literal["criado", "atualizado", "erro"]
+    id: str | None = None
+    erro: str | None = None
+
+class ResultadoImportacao(BaseModel):
+    total: int
+    criados: int
+    atualizados: int
+    erros: int
+    resultados: list[ResultadoLinha]
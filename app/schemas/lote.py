@@ -0,0 +1,21 @@
+from typing import Generic, TypeVar
+
+from beanie import PydanticObjectId
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+# Limite de IDs por chamada: cabe em uma única consulta $in e em uma resposta de tamanho razoável
+MAX_IDS_LOTE = 500
+
+# --- INPUT/OUTPUT das buscas por lista de IDs (POST /produtos/batch-get e /clientes/batch-get) ---
+
+class BuscaLote(BaseModel):
+    ids: list[PydanticObjectId] = Field(
+        ..., min_length=1, max_length=MAX_IDS_LOTE, description=f"IDs a buscar (até {MAX_IDS_LOTE})"
+    )
+
+class LoteResponse(BaseModel, Generic[T]):
+    """Documentos na ordem dos IDs pedidos (repetidos aparecem uma vez) e os IDs sem documento."""
+    items: list[T]
+    nao_encontrados: list[PydanticObjectId]
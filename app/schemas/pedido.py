@@ -1,11 +1,12 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from beanie import PydanticObjectId
-from typing import Generic, TypeVar
+from typing import Generic, Literal, TypeVar
 
 # Precisamos importar os schemas de Cliente e Produto para aninhar na resposta
 from app.schemas.cliente import ClienteResponse
 from app.schemas.produto import ProdutoResponse
+from app.models.pedido import StatusPedido
 
 # --- INPUTS (O que o usuário envia) ---
 
@@ -19,8 +20,13 @@ class PedidoCreate(BaseModel):
 
 class PedidoUpdate(BaseModel):
     """Schema para atualização de pedido."""
-    status: str | None = Field(None, description="Status do pedido (PENDENTE, PROCESSANDO, ENVIADO, ENTREGUE, CANCELADO)")
-    itens: list[ItemPedidoCreate] | None = Field(None, description="Lista de itens atualizada")
+    status: StatusPedido | None = Field(None, description="Novo status; precisa ser uma transição permitida a partir do atual")
+    itens: list[ItemPedidoCreate] | None = Field(None, description="Lista de itens atualizada (somente pedidos PENDENTE)")
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status_maiusculo(cls, valor):
+        return valor.upper() if isinstance(valor, str) else valor
 
 # --- OUTPUTS (O que a API devolve) ---
 
@@ -28,6 +34,8 @@ class ItemPedidoResponse(BaseModel):
     # Aqui usamos o ProdutoResponse para mostrar detalhes do produto (nome, etc)
     # ou podemos devolver apenas o ID se preferir. Vamos mostrar detalhes:
     produto: ProdutoResponse | None = None 
+    nome: str | None = None       # Nome do produto no momento da compra
+    categoria: str | None = None  # Categoria do produto no momento da compra
     quantidade: int
     preco_unitario: float # Preço histórico (do momento da compra)
 
@@ -43,13 +51,25 @@ class PedidoResponse(BaseModel):
     
     itens: list[ItemPedidoResponse]
 
+class PedidoPeriodoResponse(BaseModel):
+    """Resumo de pedido devolvido pelo relatório de pedidos por período."""
+    id: str
+    data: datetime
+    valor: float
+    status: str
+    cliente_id: str | None = None
+
 # --- PAGINAÇÃO ---
 T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
     """Schema genérico para respostas paginadas."""
     items: list[T]
-    page: int
+    page: int | None = None  # None quando a página foi pedida por cursor
     page_size: int
-    total_items: int
-    total_pages: int
\ No newline at end of file
+    total_items: int | None = None
+    total_pages: int | None = None
+    total_kind: Literal["exact", "estimated", "none"] = Field(
+        "exact", description="Origem do total: contagem exata, estimativa/cache ou sem contagem"
+    )
+    next_cursor: str | None = Field(None, description="Cursor da próxima página (None na última)")
\ No newline at end of file
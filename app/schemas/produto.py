@@ -8,13 +8,20 @@ class ProdutoCreate(BaseModel):
     preco: float = Field(..., gt=0, example=150.00)
     categoria: str = Field(..., example="Periféricos")
     estoque: int = Field(default=0, ge=0)
+    sku: str | None = Field(None, min_length=1, example="TEC-MEC-001")
+
+class ProdutoImportacao(ProdutoCreate):
+    """Linha de POST /produtos/bulk: o SKU identifica o produto a criar ou atualizar."""
+    sku: str = Field(..., min_length=1, example="TEC-MEC-001")
 
 class ProdutoUpdate(BaseModel):
-    nome: str | None = None
+    # Mesmos limites de ProdutoCreate: o $set é gravado direto, sem passar pelo modelo
+    nome: str | None = Field(None, min_length=2)
     descricao: str | None = None
-    preco: float | None = None
+    preco: float | None = Field(None, gt=0)
     categoria: str | None = None
-    estoque: int | None = None
+    estoque: int | None = Field(None, ge=0)
+    sku: str | None = Field(None, min_length=1)
 
 # --- O QUE ESTAVA FALTANDO (Adicione isto) ---
 class ProdutoResponse(BaseModel):
@@ -22,4 +29,9 @@ class ProdutoResponse(BaseModel):
     nome: str
     preco: float
     categoria: str
-    descricao: str | None = None
\ No newline at end of file
+    descricao: str | None = None
+
+class ProdutoCatalogoResponse(ProdutoResponse):
+    """Produto na listagem do catálogo: validado direto da projeção, sem montar o Document."""
+    estoque: int
+    sku: str | None = None
@@ -0,0 +1,33 @@
+import re
+import unicodedata
+from typing import Literal
+
+# texto: $text no índice (nome, descricao) por relevância | prefixo: autocomplete pelo início do nome
+ModoBusca = Literal["texto", "prefixo"]
+
+# Campo com o nome normalizado, indexado para a busca por prefixo
+CAMPO_PREFIXO = "nome_busca"
+
+
+def normalizar_busca(texto: str) -> str:
+    """Minúsculas e sem acentos, para a busca por prefixo não depender de caixa ou acentuação."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def filtro_busca(termo: str, modo: ModoBusca = "texto") -> dict:
+    """
+    Filtro da busca de produtos.
+    O prefixo vira um regex ancorado e sem flags sobre o nome normalizado, o que limita a
+    varredura do índice ao intervalo que começa com o termo.
+    """
+    if modo == "prefixo":
+        return {CAMPO_PREFIXO: {"$regex": "^" + re.escape(normalizar_busca(termo))}}
+    return {"$text": {"$search": termo}}
+
+
+def ordenacao_busca(modo: ModoBusca = "texto") -> list[tuple]:
+    """Ordenação da busca: relevância (textScore) ou nome normalizado, sempre desempatando por _id."""
+    if modo == "prefixo":
+        return [(CAMPO_PREFIXO, 1), ("_id", 1)]
+    return [("score", {"$meta": "textScore"}), ("_id", 1)]
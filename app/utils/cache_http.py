@@ -0,0 +1,74 @@
+import hashlib
+
+from bson import ObjectId
+from fastapi import Request, Response
+from pymongo import UpdateOne
+
+from app.models.versao import VersaoColecao
+
+
+class NaoModificado(Exception):
+    """Interrompe a rota antes de consultar o banco: o cliente já tem a versão atual (HTTP 304)."""
+
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+async def registrar_alteracao(*colecoes: str):
+    """
+    Troca o token de versão das coleções alteradas, invalidando os ETags que dependem delas.
+    O token é aleatório (e não um contador) para nunca repetir, mesmo após apagar o banco.
+    """
+    if not colecoes:
+        return
+    await VersaoColecao.get_motor_collection().bulk_write(
+        [
+            UpdateOne({"_id": colecao}, {"$set": {"token": str(ObjectId())}}, upsert=True)
+            for colecao in dict.fromkeys(colecoes)
+        ],
+        ordered=False
+    )
+
+
+async def versoes(colecoes: tuple[str, ...]) -> str:
+    """Tokens atuais das coleções, em uma única leitura por _id."""
+    documentos = await VersaoColecao.get_motor_collection().find(
+        {"_id": {"$in": list(colecoes)}}
+    ).to_list(length=None)
+    tokens = {documento["_id"]: documento["token"] for documento in documentos}
+    return ",".join(tokens.get(colecao, "-") for colecao in colecoes)
+
+
+def _etag(request: Request, versao: str) -> str:
+    """ETag forte: mesma rota, mesmos parâmetros e mesmas versões geram os mesmos bytes."""
+    parametros = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    base = f"{request.url.path}?{parametros}|{versao}"
+    return '"' + hashlib.sha1(base.encode()).hexdigest()[:32] + '"'
+
+
+def _corresponde(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip().removeprefix("W/") for valor in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+
+def cache_http(*colecoes: str, max_age: int = 0, privado: bool = False):
+    """
+    Dependência de rota para GET condicional.
+    O ETag depende das versões das coleções lidas pela rota; se o cliente enviar o mesmo ETag
+    em If-None-Match, a rota responde 304 sem executar a consulta.
+    max_age define o Cache-Control (0 = o cliente sempre revalida).
+    """
+    cache_control = f"{'private' if privado else 'public'}, " + (
+        f"max-age={max_age}" if max_age else "no-cache"
+    )
+
+    async def _verificar(request: Request, response: Response):
+        etag = _etag(request, await versoes(colecoes))
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if _corresponde(request.headers.get("if-none-match"), etag):
+            raise NaoModificado(headers)
+        response.headers.update(headers)
+
+    return _verificar
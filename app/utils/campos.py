@@ -0,0 +1,65 @@
+from functools import lru_cache
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel, create_model
+
+from app.schemas.pedido import PaginatedResponse
+
+
+def campos_resposta(modelo: type[BaseModel]):
+    """
+    Dependência de rota para o parâmetro `fields` (ex.: ?fields=id,nome,preco).
+    Os nomes são validados contra o schema de resposta; o id sempre acompanha.
+    Devolve None quando o cliente quer o objeto completo.
+    """
+    disponiveis = list(modelo.model_fields)
+
+    def _campos(
+        fields: str | None = Query(
+            None, description=f"Campos da resposta, separados por vírgula: {', '.join(disponiveis)}"
+        )
+    ) -> set[str] | None:
+        campos = {campo.strip() for campo in (fields or "").split(",") if campo.strip()}
+        if not campos:
+            return None
+        invalidos = sorted(campos.difference(disponiveis))
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos em fields: {', '.join(invalidos)}. Disponíveis: {', '.join(disponiveis)}"
+            )
+        return campos | {"id"}
+
+    return _campos
+
+
+def projetar(projecao: dict, campos: set[str] | None) -> dict:
+    """Restringe uma projeção já no formato da resposta (com id no lugar de _id) aos campos pedidos."""
+    if campos is None:
+        return projecao
+    return {chave: valor for chave, valor in projecao.items() if chave == "_id" or chave in campos}
+
+
+@lru_cache(maxsize=256)
+def modelo_parcial(modelo: type[BaseModel], campos: frozenset[str]) -> type[BaseModel]:
+    """Schema de resposta só com os campos pedidos (mesmos tipos e padrões do original)."""
+    return create_model(
+        f"{modelo.__name__}Parcial",
+        **{nome: (info.annotation, info) for nome, info in modelo.model_fields.items() if nome in campos}
+    )
+
+
+def resposta_parcial(
+    pagina: PaginatedResponse,
+    modelo: type[BaseModel],
+    campos: set[str],
+    response: Response
+) -> Response:
+    """
+    Página com objetos parciais. O response_model da rota exige o objeto completo, então o
+    JSON é gerado aqui e os headers definidos pelas dependências (ETag) são repassados.
+    """
+    tipo = PaginatedResponse[modelo_parcial(modelo, frozenset(campos))]
+    corpo = tipo.model_validate(dict(pagina)).model_dump_json()
+    headers = {nome: valor for nome, valor in response.headers.items() if nome != "content-length"}
+    return Response(content=corpo, media_type="application/json", headers=headers)
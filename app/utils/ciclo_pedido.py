@@ -0,0 +1,62 @@
+from fastapi import HTTPException
+
+from app.models.pedido import StatusPedido
+
+# Transições permitidas a partir de cada status; ENTREGUE e CANCELADO são finais
+TRANSICOES: dict[StatusPedido, set[StatusPedido]] = {
+    StatusPedido.PENDENTE: {StatusPedido.PAGO, StatusPedido.PROCESSANDO, StatusPedido.CANCELADO},
+    StatusPedido.PAGO: {StatusPedido.PROCESSANDO, StatusPedido.ENVIADO, StatusPedido.CANCELADO},
+    StatusPedido.PROCESSANDO: {StatusPedido.ENVIADO, StatusPedido.CANCELADO},
+    StatusPedido.ENVIADO: {StatusPedido.ENTREGUE},
+    StatusPedido.ENTREGUE: set(),
+    StatusPedido.CANCELADO: set(),
+}
+
+# Os itens (e portanto o valor e a reserva de estoque) só mudam antes do pagamento
+EDITAVEIS: set[StatusPedido] = {StatusPedido.PENDENTE}
+
+
+class CicloPedido:
+    """
+    Máquina de estados do pedido.
+    As transições são declaradas em um dicionário, então outro fluxo pode ser plugado
+    trocando a instância `ciclo`. Cada mudança vira uma atualização condicional ao status
+    anterior, e duas requisições concorrentes nunca aplicam transições conflitantes.
+    """
+
+    def __init__(self, transicoes: dict[StatusPedido, set[StatusPedido]], editaveis: set[StatusPedido]):
+        self.transicoes = transicoes
+        self.editaveis = editaveis
+
+    def permite(self, atual: StatusPedido, novo: StatusPedido) -> bool:
+        """Repetir o status atual é aceito (idempotente); o resto segue as transições declaradas."""
+        return atual == novo or novo in self.transicoes.get(atual, set())
+
+    def origens(self, novo: StatusPedido | None = None, itens: bool = False) -> list[StatusPedido]:
+        """Status de onde o pedido pode estar para aceitar a mudança (novo status e/ou novos itens)."""
+        return [
+            status for status in StatusPedido
+            if (novo is None or self.permite(status, novo)) and (not itens or status in self.editaveis)
+        ]
+
+    def filtro(self, novo: StatusPedido | None = None, itens: bool = False) -> dict:
+        """Condição de status para a atualização; vazio quando qualquer status serve."""
+        origens = self.origens(novo, itens)
+        if len(origens) == len(StatusPedido):
+            return {}
+        return {"status": {"$in": [status.value for status in origens]}}
+
+    def rejeitar(self, atual: str, novo: StatusPedido | None = None, itens: bool = False):
+        """Explica por que o pedido, no status atual, não aceitou a mudança (HTTP 409)."""
+        if itens and atual not in self.editaveis:
+            detalhe = f"Itens só podem ser alterados em pedidos {', '.join(sorted(self.editaveis))} (atual: {atual})"
+        else:
+            permitidos = sorted(self.transicoes.get(atual, set()))
+            detalhe = (
+                f"Transição de status inválida: {atual} -> {novo}. "
+                f"Permitidas a partir de {atual}: {', '.join(permitidos) or 'nenhuma (status final)'}"
+            )
+        raise HTTPException(status_code=409, detail=detalhe)
+
+
+ciclo = CicloPedido(TRANSICOES, EDITAVEIS)
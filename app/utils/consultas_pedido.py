@@ -0,0 +1,189 @@
+from datetime import datetime, timezone
+from typing import Any, Mapping
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from beanie import PydanticObjectId
+from fastapi import HTTPException
+
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.utils.campos import projetar
+
+# Apenas os campos expostos por ClienteResponse / ProdutoResponse saem do $lookup
+PROJECAO_CLIENTE = {"_id": 0, "id": "$_id", "nome": 1, "email": 1, "cpf": 1, "endereco": 1}
+PROJECAO_PRODUTO = {"_id": 0, "id": "$_id", "nome": 1, "preco": 1, "categoria": 1, "descricao": 1}
+
+
+def _produto_do_item() -> dict:
+    """
+    Expressão que resolve o produto de um item.
+    Itens gravados antes da migração guardam uma cópia do produto embutida no pedido;
+    itens com DBRef usam o documento trazido pelo $lookup de produtos.
+    """
+    return {
+        "$cond": [
+            {"$ifNull": ["$$item.produto.nome", False]},
+            {
+                "id": "$$item.produto._id",
+                "nome": "$$item.produto.nome",
+                "preco": "$$item.produto.preco",
+                "categoria": "$$item.produto.categoria",
+                "descricao": "$$item.produto.descricao",
+            },
+            {
+                "$first": {
+                    "$filter": {
+                        "input": "$_produtos",
+                        "as": "p",
+                        "cond": {"$eq": ["$$p.id", "$$item.produto.$id"]},
+                    }
+                }
+            },
+        ]
+    }
+
+
+def pipeline_pedidos(
+    filtro: Mapping[str, Any],
+    ordem: list[tuple[str, int]] | None = None,
+    skip: int = 0,
+    limit: int | None = None,
+    campos: set[str] | None = None
+) -> list[dict]:
+    """
+    Pipeline de leitura de pedidos no formato de PedidoResponse.
+    Filtra, ordena e pagina antes dos joins, e faz um único $lookup por coleção.
+    Com `campos` (fields=), projeta só o pedido e pula o $lookup de cliente/itens não pedidos.
+    """
+    pipeline: list[dict] = [{"$match": dict(filtro)}]
+    if ordem:
+        pipeline.append({"$sort": dict(ordem)})
+    if skip:
+        pipeline.append({"$skip": skip})
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+
+    projecao = projetar({
+        "_id": 0,
+        "id": "$_id",
+        "data_emissao": 1,
+        "status": 1,
+        "valor_total": 1,
+        "cliente": {"$first": "$_cliente"},
+        "itens": {
+            "$map": {
+                "input": "$itens",
+                "as": "item",
+                "in": {
+                    "produto": _produto_do_item(),
+                    "nome": {"$ifNull": ["$$item.nome", "$$item.produto.nome"]},
+                    "categoria": {"$ifNull": ["$$item.categoria", "$$item.produto.categoria"]},
+                    "quantidade": "$$item.quantidade",
+                    "preco_unitario": "$$item.preco_unitario",
+                },
+            }
+        },
+    }, campos)
+
+    if "cliente" in projecao:
+        pipeline.append({
+            "$lookup": {
+                "from": Cliente.get_collection_name(),
+                "localField": "cliente.$id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": PROJECAO_CLIENTE}],
+                "as": "_cliente",
+            }
+        })
+    if "itens" in projecao:
+        pipeline.append({
+            "$lookup": {
+                "from": Produto.get_collection_name(),
+                "localField": "itens.produto.$id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": PROJECAO_PRODUTO}],
+                "as": "_produtos",
+            }
+        })
+    pipeline.append({"$project": projecao})
+    return pipeline
+
+
+def pipeline_exportacao(filtro: Mapping[str, Any], ordem: list[tuple[str, int]]) -> list[dict]:
+    """
+    Pipeline da exportação de pedidos: só os campos gravados no próprio pedido, sem $lookup.
+    Itens antigos (produto embutido) saem no mesmo formato dos itens com DBRef.
+    """
+    return [
+        {"$match": dict(filtro)},
+        {"$sort": dict(ordem)},
+        {
+            "$project": {
+                "_id": 0,
+                "id": "$_id",
+                "data_emissao": 1,
+                "status": 1,
+                "valor_total": 1,
+                "cliente_id": "$cliente.$id",
+                "itens": {
+                    "$map": {
+                        "input": "$itens",
+                        "as": "item",
+                        "in": {
+                            "produto_id": {"$ifNull": ["$$item.produto.$id", "$$item.produto._id"]},
+                            "nome": {"$ifNull": ["$$item.nome", "$$item.produto.nome"]},
+                            "categoria": {"$ifNull": ["$$item.categoria", "$$item.produto.categoria"]},
+                            "quantidade": "$$item.quantidade",
+                            "preco_unitario": "$$item.preco_unitario",
+                        },
+                    }
+                },
+            }
+        },
+    ]
+
+
+async def buscar_pedidos(
+    filtro: Mapping[str, Any],
+    ordem: list[tuple[str, int]] | None = None,
+    skip: int = 0,
+    limit: int | None = None,
+    campos: set[str] | None = None
+) -> list[dict]:
+    """Executa a leitura de pedidos e devolve dicts prontos para validar em PedidoResponse."""
+    collection = Pedido.get_motor_collection()
+    cursor = collection.aggregate(pipeline_pedidos(filtro, ordem, skip, limit, campos))
+    return await cursor.to_list(length=None)
+
+
+async def buscar_pedido(id: PydanticObjectId) -> dict | None:
+    """Busca um único pedido pelo ID no formato de PedidoResponse."""
+    pedidos = await buscar_pedidos({"_id": id}, limit=1)
+    return pedidos[0] if pedidos else None
+
+
+def intervalo_periodo(ano: int, mes: int | None = None, fuso: str = "UTC") -> tuple[datetime, datetime]:
+    """
+    Converte ano (e mês) no intervalo semiaberto [início, fim) em UTC.
+    Os limites são calculados no fuso informado, então "janeiro" respeita o horário local.
+    """
+    try:
+        tz = ZoneInfo(fuso)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Fuso horário inválido: {fuso}")
+
+    if mes:
+        inicio = datetime(ano, mes, 1, tzinfo=tz)
+        fim = datetime(ano + 1, 1, 1, tzinfo=tz) if mes == 12 else datetime(ano, mes + 1, 1, tzinfo=tz)
+    else:
+        inicio = datetime(ano, 1, 1, tzinfo=tz)
+        fim = datetime(ano + 1, 1, 1, tzinfo=tz)
+
+    return inicio.astimezone(timezone.utc), fim.astimezone(timezone.utc)
+
+
+def filtro_periodo(ano: int, mes: int | None = None, fuso: str = "UTC") -> dict:
+    """Filtro por intervalo de data_emissao, que usa o índice (data_emissao, _id)."""
+    inicio, fim = intervalo_periodo(ano, mes, fuso)
+    return {"data_emissao": {"$gte": inicio, "$lt": fim}}
@@ -0,0 +1,62 @@
+from typing import Literal
+
+from app.utils.busca import CAMPO_PREFIXO, ModoBusca, filtro_busca, ordenacao_busca
+from app.utils.campos import projetar
+from app.utils.paginacao import ordenacao
+
+# Ordem da listagem sem termo de busca; cada uma tem índice com categoria à frente e _id no fim
+OrdemProdutos = Literal["id", "preco"]
+
+# Campos de ProdutoCatalogoResponse, já com o _id exposto como id
+PROJECAO_CATALOGO = {
+    "_id": 0, "id": "$_id", "nome": 1, "descricao": 1, "preco": 1, "categoria": 1, "estoque": 1, "sku": 1,
+}
+
+
+def filtro_produtos(
+    termo: str | None = None,
+    busca: ModoBusca = "texto",
+    categoria: str | None = None,
+    min_preco: float | None = None,
+    max_preco: float | None = None
+) -> dict:
+    """Filtro da listagem de produtos, no mesmo formato verificado por plano_consultas."""
+    filtro = filtro_busca(termo, busca) if termo else {}
+
+    if categoria:
+        filtro["categoria"] = categoria
+
+    faixa = {}
+    if min_preco:
+        faixa["$gte"] = min_preco
+    if max_preco:
+        faixa["$lte"] = max_preco
+    if faixa:
+        filtro["preco"] = faixa
+
+    return filtro
+
+
+def ordenacao_produtos(
+    termo: str | None = None,
+    busca: ModoBusca = "texto",
+    ordenar: OrdemProdutos = "id"
+) -> tuple[list[tuple], str | None]:
+    """
+    Ordenação da listagem e o campo usado pelo cursor (None = só _id).
+    Com termo, a ordem da busca prevalece; na busca por texto não há cursor.
+    """
+    if termo:
+        return ordenacao_busca(busca), CAMPO_PREFIXO if busca == "prefixo" else None
+    if ordenar == "preco":
+        return ordenacao("preco"), "preco"
+    return ordenacao(), None
+
+
+def projecao_produtos(campo_cursor: str | None = None, campos: set[str] | None = None) -> dict:
+    """
+    Projeção da listagem, só com os campos pedidos (fields); inclui o campo do cursor
+    (ex.: nome_busca) para montar o next_cursor.
+    """
+    projecao = projetar(PROJECAO_CATALOGO, campos)
+    return {**projecao, campo_cursor: 1} if campo_cursor else projecao
@@ -0,0 +1,159 @@
+from beanie import Link, PydanticObjectId
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from app.core.cache import cache
+from app.core.database import em_transacao
+from app.models.pedido import ItemPedido, Pedido, StatusPedido
+from app.models.produto import Produto
+from app.utils.cache_http import registrar_alteracao
+
+
+def _id_produto(item: ItemPedido) -> PydanticObjectId:
+    """ID do produto de um item, seja ele uma referência (DBRef) ou um produto embutido."""
+    produto = item.produto
+    return produto.ref.id if isinstance(produto, Link) else produto.id
+
+
+def quantidades_reservadas(pedido: Pedido) -> dict[PydanticObjectId, int]:
+    """Quantidade de estoque que o pedido mantém reservada, por produto."""
+    if not pedido.controla_estoque or pedido.status == StatusPedido.CANCELADO:
+        return {}
+
+    quantidades: dict[PydanticObjectId, int] = {}
+    for item in pedido.itens:
+        produto_id = _id_produto(item)
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + item.quantidade
+    return quantidades
+
+
+def variacao(antes: dict, depois: dict) -> dict:
+    """Diferença de reserva por produto: positivo baixa estoque, negativo devolve."""
+    delta = {pid: depois.get(pid, 0) - antes.get(pid, 0) for pid in {**antes, **depois}}
+    return {pid: q for pid, q in delta.items() if q}
+
+
+# Sem transação nada é abortado: cada baixa grava no produto o token da reserva (só os últimos
+# ficam guardados), e é ele que diz quais linhas foram aplicadas e precisam ser devolvidas
+RESERVAS_GUARDADAS = 32
+
+
+async def ajustar_estoque(delta: dict, sessao=None, condicional: bool = True):
+    """
+    Aplica a variação de estoque de todas as linhas em um único bulk_write não ordenado.
+    Baixas são condicionais (estoque >= quantidade), então dois pedidos nunca vendem a mesma unidade.
+    Se o bulk casar menos linhas do que enviou, uma leitura $in aponta todas as recusadas (sem saldo
+    ou com o produto removido) para o 409. Com sessão a transação inteira é abortada e a leitura,
+    fora dela, vê o estoque de antes; sem sessão, as linhas aplicadas são desfeitas em um segundo
+    bulk_write.
+    """
+    if not delta:
+        return
+
+    baixas = {pid: q for pid, q in delta.items() if condicional and q > 0}
+    token = ObjectId() if sessao is None and baixas else None
+    operacoes = []
+    for pid, q in delta.items():
+        if pid not in baixas:
+            operacoes.append(UpdateOne({"_id": pid}, {"$inc": {"estoque": -q}}))
+            continue
+        atualizacao = {"$inc": {"estoque": -q}}
+        if token is not None:
+            atualizacao["$push"] = {"reservas": {"$each": [token], "$slice": -RESERVAS_GUARDADAS}}
+        operacoes.append(UpdateOne({"_id": pid, "estoque": {"$gte": q}}, atualizacao))
+
+    colecao = Produto.get_motor_collection()
+    resultado = await colecao.bulk_write(operacoes, ordered=False, session=sessao)
+    if resultado.matched_count == len(operacoes) or not baixas:
+        return
+
+    # Devolução para um produto já removido também não casa: só as baixas podem ser recusadas
+    encontrados = await colecao.find(
+        {"_id": {"$in": list(delta)}}, {"nome": 1, "estoque": 1, "reservas": 1}
+    ).to_list(length=None)
+    por_id = {produto["_id"]: produto for produto in encontrados}
+    if token is None:
+        recusadas = [
+            pid for pid, q in baixas.items() if pid not in por_id or por_id[pid]["estoque"] < q
+        ]
+    else:
+        recusadas = [pid for pid in baixas if token not in por_id.get(pid, {}).get("reservas", [])]
+    if not recusadas:
+        if token is None and resultado.matched_count < len(operacoes) - (len(delta) - len(por_id)):
+            # A baixa recusada na transação ganhou saldo antes da leitura: aborta sem apontar linhas
+            raise HTTPException(status_code=409, detail="Estoque alterado durante a reserva, tente novamente")
+        return
+
+    if token is not None:
+        desfazer = [
+            UpdateOne({"_id": pid}, {"$inc": {"estoque": q}, "$pull": {"reservas": token}})
+            if pid in baixas
+            else UpdateOne({"_id": pid}, {"$inc": {"estoque": q}})
+            for pid, q in delta.items() if pid not in recusadas and pid in por_id
+        ]
+        if desfazer:
+            await colecao.bulk_write(desfazer, ordered=False)
+
+    raise HTTPException(
+        status_code=409,
+        detail=f"Estoque insuficiente para: {', '.join(por_id.get(pid, {}).get('nome', str(pid)) for pid in recusadas)}"
+    )
+
+
+async def _publicar_estoque(delta: dict):
+    """O estoque faz parte do produto em cache e das respostas do catálogo."""
+    if delta:
+        await cache.invalidar(Produto, *delta)
+        await registrar_alteracao(Produto.Settings.name)
+
+
+async def gravar_com_estoque(delta: dict, escrita):
+    """
+    Ajusta o estoque e executa escrita(sessao) como uma unidade: numa transação quando o servidor
+    suporta; caso contrário, devolvendo o estoque se a escrita falhar.
+    """
+    async def _operacao(sessao):
+        await ajustar_estoque(delta, sessao)
+        try:
+            return await escrita(sessao)
+        except Exception:
+            if sessao is None and delta:
+                await ajustar_estoque({pid: -q for pid, q in delta.items()}, condicional=False)
+            raise
+
+    # Invalida só depois do commit: antes dele uma leitura concorrente guardaria o estoque antigo
+    try:
+        return await em_transacao(_operacao)
+    finally:
+        await _publicar_estoque(delta)
+
+
+async def escrever_com_estoque(escrita, variacao_de, desfazer):
+    """
+    Variante de gravar_com_estoque para escritas atômicas que devolvem o documento anterior
+    (find_one_and_update/find_one_and_delete): a variação de estoque só é conhecida depois da escrita.
+    Numa transação, a falta de estoque desfaz tudo; sem transação, desfazer(anterior) restaura o documento.
+    Devolve o documento anterior, ou None se nada foi encontrado.
+    """
+    aplicada: dict = {}
+
+    async def _operacao(sessao):
+        nonlocal aplicada
+        anterior = await escrita(sessao)
+        if anterior is None:
+            return None
+        aplicada = variacao_de(anterior)
+        try:
+            await ajustar_estoque(aplicada, sessao)
+        except Exception:
+            if sessao is None:
+                await desfazer(anterior)
+            raise
+        return anterior
+
+    # Invalida só depois do commit: antes dele uma leitura concorrente guardaria o estoque antigo
+    try:
+        return await em_transacao(_operacao)
+    finally:
+        await _publicar_estoque(aplicada)
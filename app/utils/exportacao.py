@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterable, Literal
+
+from bson import DBRef, ObjectId
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+
+FormatoExportacao = Literal["ndjson", "csv"]
+
+TIPOS_CONTEUDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_padrao(valor: Any):
+    """Converte os tipos do BSON que o json não conhece."""
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    if isinstance(valor, DBRef):
+        return str(valor.id)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _com_id(documento: dict) -> dict:
+    """Expõe o _id como id, igual às respostas da API."""
+    if "_id" in documento:
+        documento = {"id": documento.pop("_id"), **documento}
+    return documento
+
+
+def _achatar(documento: dict, prefixo: str = "") -> dict:
+    """Achata subdocumentos em colunas com ponto (endereco.cidade) para o CSV."""
+    linha = {}
+    for chave, valor in documento.items():
+        if isinstance(valor, dict):
+            linha.update(_achatar(valor, f"{prefixo}{chave}."))
+        elif isinstance(valor, (ObjectId, DBRef, datetime)):
+            linha[prefixo + chave] = _json_padrao(valor)
+        else:
+            linha[prefixo + chave] = valor
+    return linha
+
+
+async def _blocos_ndjson(cursor) -> AsyncIterator[str]:
+    """Uma linha JSON por documento, enviadas em blocos para reduzir as escritas no socket."""
+    bloco = []
+    async for documento in cursor:
+        bloco.append(json.dumps(_com_id(documento), default=_json_padrao, ensure_ascii=False))
+        if len(bloco) >= settings.EXPORT_BLOCK_SIZE:
+            yield "\n".join(bloco) + "\n"
+            bloco = []
+    if bloco:
+        yield "\n".join(bloco) + "\n"
+
+
+async def _blocos_csv(
+    cursor,
+    colunas: list[str],
+    linhas: Callable[[dict], Iterable[dict]] | None
+) -> AsyncIterator[str]:
+    """Cabeçalho e linhas CSV; `linhas` pode expandir um documento em várias linhas."""
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=colunas, extrasaction="ignore")
+    escritor.writeheader()
+    pendentes = 0
+
+    async for documento in cursor:
+        documento = _com_id(documento)
+        for linha in (linhas(documento) if linhas else [documento]):
+            escritor.writerow(_achatar(linha))
+            pendentes += 1
+        if pendentes >= settings.EXPORT_BLOCK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+
+    yield buffer.getvalue()
+
+
+def resposta_exportacao(
+    cursor,
+    formato: FormatoExportacao,
+    nome: str,
+    colunas: list[str],
+    linhas_csv: Callable[[dict], Iterable[dict]] | None = None
+) -> StreamingResponse:
+    """
+    Resposta em streaming a partir de um cursor do Motor (find ou aggregate).
+    O cursor busca um lote por vez, então a memória não cresce com o tamanho da exportação.
+    """
+    if formato == "csv":
+        conteudo = _blocos_csv(cursor, colunas, linhas_csv)
+    else:
+        conteudo = _blocos_ndjson(cursor)
+
+    return StreamingResponse(
+        conteudo,
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'}
+    )
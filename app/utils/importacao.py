@@ -0,0 +1,171 @@
+import json
+from typing import Any, AsyncIterator, Callable
+
+from beanie import Document
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.schemas.importacao import ResultadoImportacao, ResultadoLinha
+
+
+async def ler_linhas(request: Request) -> AsyncIterator[tuple[int, Any]]:
+    """
+    Lê o corpo da importação: um array JSON ou NDJSON (application/x-ndjson).
+    O NDJSON é consumido à medida que chega, sem carregar o corpo inteiro em memória.
+    Linhas com JSON inválido são devolvidas como a própria exceção.
+    """
+    if "ndjson" not in request.headers.get("content-type", ""):
+        try:
+            corpo = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Corpo deve ser um array JSON ou NDJSON")
+        if not isinstance(corpo, list):
+            raise HTTPException(status_code=400, detail="Corpo deve ser um array JSON ou NDJSON")
+        for numero, objeto in enumerate(corpo, start=1):
+            yield numero, objeto
+        return
+
+    numero = 0
+    resto = b""
+    async for pedaco in request.stream():
+        *linhas, resto = (resto + pedaco).split(b"\n")
+        for linha in linhas:
+            numero += 1
+            if linha.strip():
+                yield numero, _decodificar(linha)
+    if resto.strip():
+        yield numero + 1, _decodificar(resto)
+
+
+def _decodificar(linha: bytes) -> Any:
+    try:
+        return json.loads(linha)
+    except ValueError as exc:
+        return exc
+
+
+def _mensagem_validacao(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in erro['loc']) or 'linha'}: {erro['msg']}"
+        for erro in exc.errors()
+    )
+
+
+def _mensagem_escrita(erro: dict) -> str:
+    if erro.get("code") == 11000:
+        return f"Já existe um registro com estes dados únicos: {erro.get('keyValue', {})}"
+    return erro.get("errmsg", "Erro ao gravar")
+
+
+async def _gravar_lote(
+    modelo: type[Document],
+    chave: str,
+    lote: list[tuple[int, str, dict]]
+) -> list[ResultadoLinha]:
+    """Um bulk_write não ordenado com um upsert por linha; falhas de uma linha não param as demais."""
+    colecao = modelo.get_motor_collection()
+    operacoes = [UpdateOne({chave: valor}, atualizacao, upsert=True) for _, valor, atualizacao in lote]
+
+    try:
+        detalhes = (await colecao.bulk_write(operacoes, ordered=False)).bulk_api_result
+    except BulkWriteError as exc:
+        detalhes = exc.details
+
+    erros = {erro["index"]: _mensagem_escrita(erro) for erro in detalhes.get("writeErrors", [])}
+    criados = {upsert["index"] for upsert in detalhes.get("upserted", [])}
+
+    # IDs de todas as linhas do lote, para a resposta e para invalidar o cache
+    valores = [valor for _, valor, _ in lote]
+    gravados = await colecao.find({chave: {"$in": valores}}, {chave: 1}).to_list(length=None)
+    ids = {documento[chave]: documento["_id"] for documento in gravados}
+    await cache.invalidar(modelo, *ids.values())
+
+    resultados = []
+    for indice, (linha, valor, _) in enumerate(lote):
+        if indice in erros:
+            resultados.append(ResultadoLinha(linha=linha, chave=valor, status="erro", erro=erros[indice]))
+        else:
+            resultados.append(ResultadoLinha(
+                linha=linha,
+                chave=valor,
+                status="criado" if indice in criados else "atualizado",
+                id=str(ids[valor]) if valor in ids else None
+            ))
+    return resultados
+
+
+def _embutir_definicoes(valor: Any, definicoes: dict) -> Any:
+    if isinstance(valor, dict):
+        if "$ref" in valor:
+            return _embutir_definicoes(definicoes[valor["$ref"].rsplit("/", 1)[-1]], definicoes)
+        return {chave: _embutir_definicoes(item, definicoes) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        return [_embutir_definicoes(item, definicoes) for item in valor]
+    return valor
+
+
+def corpo_importacao(schema: type[BaseModel]) -> dict:
+    """
+    openapi_extra das rotas /bulk: elas leem o corpo cru (em streaming), então o FastAPI não
+    documenta o corpo sozinho. Os modelos aninhados vão embutidos, sem depender de components.
+    """
+    linha = schema.model_json_schema()
+    linha = _embutir_definicoes(linha, linha.pop("$defs", {}))
+    return {
+        "requestBody": {
+            "required": True,
+            "description": "Array JSON ou NDJSON, um objeto por linha.",
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": linha}},
+                "application/x-ndjson": {"schema": linha},
+            },
+        }
+    }
+
+
+async def importar(
+    request: Request,
+    modelo: type[Document],
+    schema: type[BaseModel],
+    chave: str,
+    atualizacao: Callable[[BaseModel], dict]
+) -> ResultadoImportacao:
+    """
+    Valida cada linha com o schema e grava em lotes de BULK_BATCH_SIZE com upsert pela chave natural.
+    Duplicidades são detectadas pelos índices únicos, sem consultas prévias.
+    """
+    resultados: list[ResultadoLinha] = []
+    lote: list[tuple[int, str, dict]] = []
+
+    async for linha, dados in ler_linhas(request):
+        valor = dados.get(chave) if isinstance(dados, dict) else None
+        if isinstance(dados, Exception):
+            resultados.append(ResultadoLinha(linha=linha, status="erro", erro=f"JSON inválido: {dados}"))
+            continue
+        try:
+            item = schema.model_validate(dados)
+        except ValidationError as exc:
+            chave_texto = str(valor) if valor is not None else None
+            resultados.append(ResultadoLinha(linha=linha, chave=chave_texto, status="erro", erro=_mensagem_validacao(exc)))
+            continue
+
+        lote.append((linha, getattr(item, chave), atualizacao(item)))
+        if len(lote) >= settings.BULK_BATCH_SIZE:
+            resultados += await _gravar_lote(modelo, chave, lote)
+            lote = []
+
+    if lote:
+        resultados += await _gravar_lote(modelo, chave, lote)
+
+    resultados.sort(key=lambda resultado: resultado.linha)
+    return ResultadoImportacao(
+        total=len(resultados),
+        criados=sum(r.status == "criado" for r in resultados),
+        atualizados=sum(r.status == "atualizado" for r in resultados),
+        erros=sum(r.status == "erro" for r in resultados),
+        resultados=resultados
+    )
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+
+from bson import DBRef
+from pymongo import UpdateOne
+
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.utils.resumos import reconstruir_resumos
+from app.utils.busca import normalizar_busca
+
+# Pedidos com algum item sem a cópia de nome/categoria ou ainda com o produto embutido
+FILTRO_ITENS_ANTIGOS = {
+    "itens": {
+        "$elemMatch": {
+            "$or": [
+                {"categoria": {"$exists": False}},
+                {"produto._id": {"$exists": True}},
+            ]
+        }
+    }
+}
+
+
+def _id_produto(item: dict):
+    """ObjectId do produto de um item, esteja ele embutido ou referenciado por DBRef."""
+    produto = item.get("produto")
+    if isinstance(produto, DBRef):
+        return produto.id
+    if isinstance(produto, dict):
+        return produto.get("_id")
+    return None
+
+
+def _migrar_item(item: dict, produtos_atuais: dict) -> dict:
+    """
+    Converte um item para o formato atual: DBRef + cópia de nome e categoria.
+    A cópia vem do produto embutido no pedido (estado na data da compra) ou, na falta dele,
+    do cadastro atual do produto.
+    """
+    produto_id = _id_produto(item)
+    embutido = item["produto"] if isinstance(item.get("produto"), dict) else {}
+    atual = produtos_atuais.get(produto_id, {})
+
+    return {
+        "produto": DBRef(Produto.get_collection_name(), produto_id),
+        "nome": item.get("nome") or embutido.get("nome") or atual.get("nome"),
+        "categoria": item.get("categoria") or embutido.get("categoria") or atual.get("categoria"),
+        "quantidade": item["quantidade"],
+        "preco_unitario": item["preco_unitario"],
+    }
+
+
+async def backfill_itens_pedido(tamanho_lote: int = 1000) -> int:
+    """
+    Preenche nome/categoria nos itens dos pedidos existentes e troca produtos embutidos por DBRef.
+    Processa em lotes com um bulk_write por lote. Retorna a quantidade de pedidos migrados.
+    """
+    pedidos = Pedido.get_motor_collection()
+    produtos = Produto.get_motor_collection()
+    migrados = 0
+
+    while True:
+        lote = await pedidos.find(FILTRO_ITENS_ANTIGOS, {"itens": 1}).limit(tamanho_lote).to_list(length=None)
+        if not lote:
+            break
+
+        # Só busca no cadastro os produtos cujos itens não trazem a cópia embutida
+        faltando = {
+            _id_produto(item)
+            for pedido in lote
+            for item in pedido["itens"]
+            if not isinstance(item.get("produto"), dict) and not item.get("categoria")
+        }
+        produtos_atuais = {}
+        if faltando:
+            encontrados = await produtos.find(
+                {"_id": {"$in": list(faltando)}}, {"nome": 1, "categoria": 1}
+            ).to_list(length=None)
+            produtos_atuais = {produto["_id"]: produto for produto in encontrados}
+
+        operacoes = [
+            UpdateOne(
+                {"_id": pedido["_id"]},
+                {"$set": {"itens": [_migrar_item(item, produtos_atuais) for item in pedido["itens"]]}}
+            )
+            for pedido in lote
+        ]
+        await pedidos.bulk_write(operacoes, ordered=False)
+        migrados += len(lote)
+        print(f"   -> {migrados} pedidos migrados...")
+
+    return migrados
+
+
+async def backfill_nome_busca(tamanho_lote: int = 1000) -> int:
+    """Preenche o nome normalizado (busca por prefixo) dos produtos que ainda não o têm."""
+    produtos = Produto.get_motor_collection()
+    migrados = 0
+
+    while True:
+        lote = await produtos.find(
+            {"nome_busca": {"$exists": False}}, {"nome": 1}
+        ).limit(tamanho_lote).to_list(length=None)
+        if not lote:
+            break
+
+        await produtos.bulk_write(
+            [
+                UpdateOne({"_id": produto["_id"]}, {"$set": {"nome_busca": normalizar_busca(produto["nome"])}})
+                for produto in lote
+            ],
+            ordered=False
+        )
+        migrados += len(lote)
+        print(f"   -> {migrados} produtos atualizados...")
+
+    return migrados
+
+
+async def _main(comando: str):
+    from app.core.database import init_db, criar_indices
+
+    await init_db(indices=False)
+
+    if comando == "indices":
+        # Com CREATE_INDEXES_ON_STARTUP=false, os índices são criados aqui, uma vez por deploy
+        print("🔄 Criando índices declarados nos modelos...")
+        for nome in await criar_indices():
+            print(f"   -> Índice de texto antigo removido: {nome}")
+        print("✅ Índices criados.")
+
+    elif comando == "backfill-itens":
+        print("🔄 Copiando nome/categoria dos produtos para os itens dos pedidos...")
+        total = await backfill_itens_pedido()
+        # Os resumos por categoria passam a usar a cópia gravada nos itens
+        await reconstruir_resumos()
+        print(f"✅ Backfill concluído: {total} pedidos atualizados.")
+
+    elif comando == "nome-busca":
+        print("🔄 Preenchendo o nome normalizado dos produtos (busca por prefixo)...")
+        total = await backfill_nome_busca()
+        print(f"✅ Backfill concluído: {total} produtos atualizados.")
+
+
+if __name__ == "__main__":
+    # python -m app.utils.migracoes indices | backfill-itens | nome-busca
+    parser = argparse.ArgumentParser(description="Migrações de dados da API")
+    parser.add_argument("comando", choices=["indices", "backfill-itens", "nome-busca"])
+    args = parser.parse_args()
+    asyncio.run(_main(args.comando))
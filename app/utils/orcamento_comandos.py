@@ -0,0 +1,158 @@
+import asyncio
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from app.core.cache import cache
+from app.core.metricas import ComandosRequisicao, capturar_comandos
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+
+
+class OrcamentoExcedido(AssertionError):
+    """Um trecho enviou mais comandos ao banco do que o orçamento declarado."""
+
+    def __init__(self, descricao: str, maximo: int, captura: ComandosRequisicao):
+        self.descricao = descricao
+        self.maximo = maximo
+        self.captura = captura
+        linhas = "\n".join(f"  {i}. {comando.descrever()}" for i, comando in enumerate(captura.comandos, start=1))
+        super().__init__(
+            f"{descricao}: {len(captura.comandos)} comandos ao banco (orçamento: {maximo})\n{linhas}"
+        )
+
+
+@contextmanager
+def orcamento_comandos(maximo: int, descricao: str = "trecho"):
+    """
+    Falha com OrcamentoExcedido (listando os comandos) se o bloco enviar mais de `maximo`
+    comandos ao MongoDB. Uso: with orcamento_comandos(3, "POST /pedidos"): await cliente.post(...)
+    """
+    with capturar_comandos(descricao) as captura:
+        yield captura
+    if len(captura.comandos) > maximo:
+        raise OrcamentoExcedido(descricao, maximo, captura)
+
+
+@dataclass
+class Orcamento:
+    nome: str
+    maximo: int
+    # Recebe o cliente HTTP e os dados de apoio; pode guardar IDs criados para os passos seguintes
+    requisicao: Callable[[Any, dict], Awaitable[Any]]
+    # Sem transações não há commitTransaction: um comando a menos nas rotas que gravam em transação
+    maximo_sem_transacao: int | None = None
+
+
+def _carrinho(dados: dict, itens: int) -> dict:
+    return {
+        "cliente_id": str(dados["cliente"]),
+        "itens": [{"produto_id": str(pid), "quantidade": 1} for pid in dados["produtos"][:itens]],
+    }
+
+
+async def _criar_pedido(http, dados: dict, itens: int):
+    resposta = await http.post("/pedidos/", json=_carrinho(dados, itens))
+    dados.setdefault("pedidos", []).append(resposta.json().get("id"))
+    return resposta
+
+
+# Orçamentos com cache frio: o pior caso de cada rota. A baixa de estoque é um bulk_write só,
+# qualquer que seja o tamanho do carrinho. Comandos das escritas (a sessão não envia comando
+# próprio; a transação acrescenta só o commitTransaction):
+#   POST /pedidos: find cliente + find produtos + update estoque + insert pedido [+ commit]
+#                  + versão dos produtos + 2 resumos + versão dos pedidos
+#   PUT status:    findAndModify [+ commit] + find cliente + find produtos + versão dos pedidos
+#   DELETE:        findAndModify + update estoque [+ commit] + versão dos produtos + 2 resumos
+#                  + versão dos pedidos
+ORCAMENTOS = [
+    Orcamento("POST /pedidos (1 item)", 9, lambda http, d: _criar_pedido(http, d, 1), maximo_sem_transacao=8),
+    Orcamento("POST /pedidos (20 itens)", 9, lambda http, d: _criar_pedido(http, d, 20), maximo_sem_transacao=8),
+    Orcamento("GET /pedidos", 2, lambda http, d: http.get("/pedidos/?page_size=20")),
+    Orcamento("GET /pedidos?status", 1, lambda http, d: http.get("/pedidos/?status=PENDENTE&count=none")),
+    Orcamento("GET /pedidos/{id}", 1, lambda http, d: http.get(f"/pedidos/{d['pedidos'][0]}")),
+    Orcamento("GET /pedidos/cliente/{id}", 3, lambda http, d: http.get(f"/pedidos/cliente/{d['cliente']}")),
+    Orcamento(
+        "PUT /pedidos/{id} (status)", 5,
+        lambda http, d: http.put(f"/pedidos/{d['pedidos'][0]}", json={"status": "PAGO"}), maximo_sem_transacao=4
+    ),
+    Orcamento(
+        "DELETE /pedidos/{id}", 7, lambda http, d: http.delete(f"/pedidos/{d['pedidos'][0]}"), maximo_sem_transacao=6
+    ),
+    Orcamento("GET /produtos?termo", 3, lambda http, d: http.get("/produtos/?termo=produto")),
+    Orcamento("GET /produtos/{id}", 2, lambda http, d: http.get(f"/produtos/{d['produtos'][0]}")),
+    Orcamento("POST /produtos/batch-get", 1, lambda http, d: http.post(
+        "/produtos/batch-get", json={"ids": [str(pid) for pid in d["produtos"]]}
+    )),
+    Orcamento("GET /clientes/{id}", 1, lambda http, d: http.get(f"/clientes/{d['cliente']}")),
+    Orcamento("POST /clientes/batch-get", 1, lambda http, d: http.post(
+        "/clientes/batch-get", json={"ids": [str(d["cliente"])]}
+    )),
+    Orcamento("GET /analytics/produtos-por-categoria", 2, lambda http, d: http.get("/analytics/produtos-por-categoria")),
+    Orcamento("GET /analytics/ticket-medio", 2, lambda http, d: http.get("/analytics/ticket-medio")),
+    Orcamento("GET /analytics/vendas-por-categoria", 2, lambda http, d: http.get("/analytics/vendas-por-categoria")),
+    Orcamento("GET /analytics/pedidos-por-periodo", 3, lambda http, d: http.get("/analytics/pedidos-por-periodo?ano=2024")),
+]
+
+
+async def _dados_apoio() -> dict:
+    """Um cliente e 20 produtos com estoque já existentes no banco."""
+    cliente = await Cliente.get_motor_collection().find_one({}, {"_id": 1})
+    produtos = await Produto.get_motor_collection().find(
+        {"estoque": {"$gte": 2}}, {"_id": 1}
+    ).limit(20).to_list(length=None)
+    if cliente is None or len(produtos) < 20:
+        return {}
+    return {"cliente": cliente["_id"], "produtos": [produto["_id"] for produto in produtos]}
+
+
+async def verificar_orcamentos(http) -> list[str]:
+    """Executa cada requisição com o cache frio e devolve os nomes das que estouraram o orçamento."""
+    from app.core.database import suporta_transacoes
+
+    dados = await _dados_apoio()
+    if not dados:
+        raise RuntimeError("O banco precisa de ao menos 1 cliente e 20 produtos com estoque (rode o seeder).")
+
+    transacoes = await suporta_transacoes()
+    print(f"Transações: {'sim' if transacoes else 'não (compensação)'}")
+
+    falhas = []
+    for orcamento in ORCAMENTOS:
+        await asyncio.gather(cache.invalidar(Cliente, dados["cliente"]), cache.invalidar(Produto, *dados["produtos"]))
+        maximo = orcamento.maximo if transacoes or orcamento.maximo_sem_transacao is None else orcamento.maximo_sem_transacao
+        try:
+            with orcamento_comandos(maximo, orcamento.nome) as captura:
+                resposta = await orcamento.requisicao(http, dados)
+            print(f"✅ {orcamento.nome}: {len(captura.comandos)}/{maximo} comandos (HTTP {resposta.status_code})")
+        except OrcamentoExcedido as exc:
+            print(f"❌ {exc}")
+            falhas.append(orcamento.nome)
+
+    # Remove os pedidos que sobraram (o DELETE medido remove só o primeiro)
+    for pedido_id in dados.get("pedidos", [])[1:]:
+        await http.delete(f"/pedidos/{pedido_id}")
+    return falhas
+
+
+async def _main() -> int:
+    # Dependência só de verificação: pip install -e ".[bench]"
+    import httpx
+
+    from app.core.database import init_db
+    from app.main import app
+
+    await init_db()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://orcamento") as http:
+        falhas = await verificar_orcamentos(http)
+    if falhas:
+        print(f"❌ {len(falhas)} rota(s) acima do orçamento: {', '.join(falhas)}")
+        return 1
+    print("✅ Todas as rotas dentro do orçamento de comandos.")
+    return 0
+
+
+if __name__ == "__main__":
+    # python -m app.utils.orcamento_comandos  (sai com código 1 se alguma rota estourar o orçamento)
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,153 @@
+import base64
+import binascii
+import math
+import time
+from datetime import datetime
+from typing import Any, Literal, Mapping
+
+from beanie import Document
+from bson import ObjectId, json_util
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.utils.busca import CAMPO_PREFIXO
+
+# exact: count_documents | estimated: metadados da coleção ou contagem em cache | none: sem total
+ModoContagem = Literal["exact", "estimated", "none"]
+
+# Contagens de buscas filtradas: (coleção, filtro) -> (expira_em, total)
+_cache_contagens: dict[tuple[str, str], tuple[float, int]] = {}
+_CACHE_CONTAGENS_MAX = 1024
+
+# Tipos aceitos no valor do cursor, por campo de ordenação: o que vem do cliente nunca vira operador.
+# Toda listagem ordenada por outro campo além do _id registra aqui o tipo dele
+_TIPOS_CURSOR: dict[str, tuple[type, ...]] = {
+    "data_emissao": (datetime,),
+    CAMPO_PREFIXO: (str,),
+    "preco": (int, float),
+}
+
+
+def codificar_cursor(ultimo_id: Any, campo: str | None = None, valor: Any = None) -> str:
+    """
+    Gera um cursor opaco a partir do último documento da página.
+    O cursor guarda o _id (e, se houver, a chave de ordenação) para a próxima consulta.
+    """
+    payload = {"id": ultimo_id}
+    if campo:
+        payload["c"] = campo
+        payload["v"] = valor
+    bruto = json_util.dumps(payload).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, campo: str | None = None) -> dict:
+    """Decodifica um cursor gerado por codificar_cursor. Cursores inválidos geram HTTP 400."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json_util.loads(bruto)
+    except (binascii.Error, ValueError, InvalidId, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if not isinstance(payload, dict) or "id" not in payload or payload.get("c") != campo:
+        raise HTTPException(status_code=400, detail="Cursor inválido para esta listagem")
+    if not isinstance(payload["id"], ObjectId) or (campo is not None and not _valor_aceito(campo, payload.get("v"))):
+        raise HTTPException(status_code=400, detail="Cursor inválido para esta listagem")
+    return payload
+
+
+def _valor_aceito(campo: str, valor: Any) -> bool:
+    """O valor do cursor tem o tipo do campo de ordenação (documentos sem o campo ordenam como nulo)."""
+    if valor is None:
+        return True
+    return isinstance(valor, _TIPOS_CURSOR.get(campo, ())) and not isinstance(valor, bool)
+
+
+def filtro_cursor(cursor: str, campo: str | None = None, direcao: int = 1) -> dict:
+    """
+    Monta o filtro keyset que continua a listagem a partir do cursor.
+    Sem campo, pagina apenas por _id; com campo, pelo par (campo, _id).
+    """
+    payload = decodificar_cursor(cursor, campo)
+    operador = "$gt" if direcao == 1 else "$lt"
+
+    if campo is None:
+        return {"_id": {operador: payload["id"]}}
+
+    return {
+        "$or": [
+            {campo: {operador: payload["v"]}},
+            {campo: payload["v"], "_id": {operador: payload["id"]}},
+        ]
+    }
+
+
+def ordenacao(campo: str | None = None, direcao: int = 1) -> list[tuple[str, int]]:
+    """Ordenação determinística compatível com filtro_cursor."""
+    if campo is None:
+        return [("_id", direcao)]
+    return [(campo, direcao), ("_id", direcao)]
+
+
+def _valor(documento: Any, chave: str) -> Any:
+    if isinstance(documento, dict):
+        return documento["_id"] if chave == "id" and "_id" in documento else documento[chave]
+    return getattr(documento, chave)
+
+
+def proximo_cursor(itens: list, page_size: int, campo: str | None = None) -> str | None:
+    """
+    Recebe a página buscada com limit(page_size + 1) e devolve o cursor da próxima página,
+    ou None se esta for a última. O item excedente serve apenas para saber se há mais dados.
+    """
+    if len(itens) <= page_size:
+        return None
+
+    ultimo = itens[page_size - 1]
+    valor = _valor(ultimo, campo) if campo else None
+    return codificar_cursor(_valor(ultimo, "id"), campo, valor)
+
+
+async def contar(
+    modelo: type[Document],
+    filtro: Mapping[str, Any],
+    modo: ModoContagem = "exact",
+    colecao=None
+) -> tuple[int | None, ModoContagem]:
+    """
+    Conta os documentos da listagem conforme o modo pedido.
+    Retorna o total e o tipo de total efetivamente entregue.
+    `colecao` permite contar com outras opções de leitura (ex.: a coleção de analytics).
+    """
+    if modo == "none":
+        return None, "none"
+
+    colecao = colecao if colecao is not None else modelo.get_motor_collection()
+
+    if modo == "exact":
+        return await colecao.count_documents(filtro), "exact"
+
+    # Sem filtro, o total sai dos metadados da coleção, sem percorrer documentos
+    if not filtro:
+        return await colecao.estimated_document_count(), "estimated"
+
+    # Com filtro, reaproveita por alguns segundos a última contagem exata da mesma busca
+    chave = (colecao.name, json_util.dumps(filtro, sort_keys=True))
+    agora = time.monotonic()
+    em_cache = _cache_contagens.get(chave)
+    if em_cache and em_cache[0] > agora:
+        return em_cache[1], "estimated"
+
+    total = await colecao.count_documents(filtro)
+    if len(_cache_contagens) >= _CACHE_CONTAGENS_MAX:
+        _cache_contagens.pop(next(iter(_cache_contagens)))
+    _cache_contagens[chave] = (agora + settings.COUNT_CACHE_TTL, total)
+    return total, "exact"
+
+
+def total_paginas(total_items: int | None, page_size: int) -> int | None:
+    """Quantidade de páginas para o total informado (None quando não houve contagem)."""
+    if total_items is None:
+        return None
+    return math.ceil(total_items / page_size) if total_items > 0 else 1
@@ -0,0 +1,131 @@
+import asyncio
+import sys
+from datetime import datetime
+
+from beanie import Document, PydanticObjectId
+
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.utils.consultas_pedido import filtro_periodo
+from app.utils.consultas_produto import filtro_produtos, ordenacao_produtos
+from app.utils.paginacao import codificar_cursor, filtro_cursor, ordenacao
+
+
+def _consultas_pedidos() -> list[tuple[str, type[Document], dict, list]]:
+    """Formatos de consulta de pedidos: (nome, modelo, filtro, ordenação)."""
+    cliente_id = PydanticObjectId()
+    cursor_data = codificar_cursor(PydanticObjectId(), "data_emissao", datetime(2024, 6, 15))
+    cursor_fila = codificar_cursor(PydanticObjectId(), "data_emissao", datetime(2024, 6, 15))
+    periodo = filtro_periodo(2024, 6, "America/Sao_Paulo")
+
+    return [
+        ("pedidos: listagem", Pedido, {}, ordenacao()),
+        ("pedidos: listagem por cursor", Pedido, filtro_cursor(codificar_cursor(PydanticObjectId())), ordenacao()),
+        ("pedidos: por período (ano)", Pedido, filtro_periodo(2024), ordenacao("data_emissao", -1)),
+        ("pedidos: por período (mês)", Pedido, periodo, ordenacao("data_emissao", -1)),
+        (
+            "pedidos: por período com cursor", Pedido,
+            {**periodo, **filtro_cursor(cursor_data, "data_emissao", -1)}, ordenacao("data_emissao", -1)
+        ),
+        ("pedidos: por cliente", Pedido, {"cliente.$id": cliente_id}, ordenacao("data_emissao", -1)),
+        ("pedidos: fila por status", Pedido, {"status": "PENDENTE"}, ordenacao("data_emissao")),
+        (
+            "pedidos: fila por status com cursor", Pedido,
+            {"status": "PENDENTE", **filtro_cursor(cursor_fila, "data_emissao")}, ordenacao("data_emissao")
+        ),
+    ]
+
+
+def _consultas_produtos() -> list[tuple[str, type[Document], dict, list]]:
+    """Cada combinação de filtros e ordem aceita por listar_produtos, com e sem cursor."""
+    filtros = {
+        "sem filtro": {},
+        "categoria": {"categoria": "Livros"},
+        "faixa de preço": {"min_preco": 50.0, "max_preco": 200.0},
+        "preço mínimo": {"min_preco": 50.0},
+        "categoria e faixa de preço": {"categoria": "Livros", "min_preco": 50.0, "max_preco": 200.0},
+    }
+
+    formatos = []
+    for ordenar in ("id", "preco"):
+        ordem, campo = ordenacao_produtos(ordenar=ordenar)
+        cursor = codificar_cursor(PydanticObjectId(), campo, 100.0 if campo else None)
+        for descricao, parametros in filtros.items():
+            filtro = filtro_produtos(**parametros)
+            formatos.append((f"produtos: {descricao}, por {ordenar}", Produto, filtro, ordem))
+            formatos.append((
+                f"produtos: {descricao}, por {ordenar} com cursor", Produto,
+                {"$and": [filtro, filtro_cursor(cursor, campo)]}, ordem
+            ))
+
+    for busca in ("texto", "prefixo"):
+        ordem, _ = ordenacao_produtos("teclado", busca)
+        formatos.append((f"produtos: busca por {busca}", Produto, filtro_produtos("teclado", busca), ordem))
+        formatos.append((
+            f"produtos: busca por {busca} e categoria", Produto,
+            filtro_produtos("teclado", busca, categoria="Livros"), ordem
+        ))
+    return formatos
+
+
+def consultas() -> list[tuple[str, type[Document], dict, list]]:
+    """Todos os formatos de consulta usados pelas rotas, verificados contra COLLSCAN."""
+    return _consultas_pedidos() + _consultas_produtos()
+
+
+def _estagios(plano) -> list[str]:
+    """Coleta recursivamente os nomes dos estágios de um plano de execução."""
+    estagios = []
+    if isinstance(plano, dict):
+        if "stage" in plano:
+            estagios.append(plano["stage"])
+        for valor in plano.values():
+            estagios += _estagios(valor)
+    elif isinstance(plano, list):
+        for valor in plano:
+            estagios += _estagios(valor)
+    return estagios
+
+
+async def explicar(modelo: type[Document], filtro: dict, ordem: list, limit: int = 11) -> list[str]:
+    """Executa explain (queryPlanner) do find e devolve os estágios do plano vencedor."""
+    colecao = modelo.get_motor_collection()
+    resultado = await colecao.database.command({
+        "explain": {
+            "find": colecao.name,
+            "filter": filtro,
+            "sort": dict(ordem),
+            "limit": limit,
+        },
+        "verbosity": "queryPlanner",
+    })
+    return _estagios(resultado["queryPlanner"]["winningPlan"])
+
+
+async def verificar_planos() -> list[str]:
+    """Devolve a lista de consultas que fazem COLLSCAN (vazia se todas usam índice)."""
+    falhas = []
+    for nome, modelo, filtro, ordem in consultas():
+        estagios = await explicar(modelo, filtro, ordem)
+        situacao = "❌" if "COLLSCAN" in estagios else "✅"
+        print(f"{situacao} {nome}: {' <- '.join(estagios)}")
+        if "COLLSCAN" in estagios:
+            falhas.append(nome)
+    return falhas
+
+
+async def _main() -> int:
+    from app.core.database import init_db
+
+    await init_db()
+    falhas = await verificar_planos()
+    if falhas:
+        print(f"❌ {len(falhas)} consulta(s) sem índice: {', '.join(falhas)}")
+        return 1
+    print("✅ Todas as consultas usam índice.")
+    return 0
+
+
+if __name__ == "__main__":
+    # python -m app.utils.plano_consultas  (sai com código 1 se alguma consulta fizer COLLSCAN)
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,168 @@
+import asyncio
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from app.models.pedido import Pedido, StatusPedido
+from app.models.produto import Produto
+from app.models.resumo import ResumoPedidosDia, ResumoVendasCategoria, ResumoProdutosCategoria
+from app.utils.cache_http import registrar_alteracao
+
+
+def _dia(data: datetime) -> datetime:
+    """Trunca a data para a meia-noite (UTC) do dia (chave dos resumos diários)."""
+    if data.tzinfo is not None:
+        data = data.astimezone(timezone.utc)
+    return datetime(data.year, data.month, data.day, tzinfo=timezone.utc)
+
+
+def _categoria_item(item) -> str | None:
+    """Categoria gravada no item; itens anteriores à migração trazem o produto embutido."""
+    return item.categoria or getattr(item.produto, "categoria", None)
+
+
+def contribuicao(pedido: Pedido) -> dict:
+    """
+    Calcula quanto um pedido soma nos resumos.
+    Pedidos cancelados contam no total de pedidos, mas não nas vendas por categoria.
+    """
+    categorias: dict[str | None, list] = {}
+    if pedido.status != StatusPedido.CANCELADO:
+        for item in pedido.itens:
+            total = categorias.setdefault(_categoria_item(item), [0.0, 0])
+            total[0] += item.quantidade * item.preco_unitario
+            total[1] += item.quantidade
+
+    return {
+        "dia": _dia(pedido.data_emissao),
+        "faturamento": pedido.valor_total,
+        "categorias": categorias,
+    }
+
+
+async def atualizar_resumos(antes: dict | None, depois: dict | None):
+    """
+    Aplica nos resumos a diferença entre duas contribuições de um pedido.
+    Criação: (None, depois) | Remoção: (antes, None) | Atualização: (antes, depois).
+    """
+    pedidos_dia: dict[datetime, list] = {}
+    vendas: dict[tuple, list] = {}
+
+    for contrib, sinal in ((antes, -1), (depois, 1)):
+        if contrib is None:
+            continue
+        delta = pedidos_dia.setdefault(contrib["dia"], [0, 0.0])
+        delta[0] += sinal
+        delta[1] += sinal * contrib["faturamento"]
+        for categoria, (total, quantidade) in contrib["categorias"].items():
+            delta = vendas.setdefault((contrib["dia"], categoria), [0.0, 0])
+            delta[0] += sinal * total
+            delta[1] += sinal * quantidade
+
+    ops_dia = [
+        UpdateOne(
+            {"dia": dia},
+            {"$inc": {"total_pedidos": qtd, "faturamento_total": valor}},
+            upsert=True
+        )
+        for dia, (qtd, valor) in pedidos_dia.items()
+        if qtd or valor
+    ]
+    ops_vendas = [
+        UpdateOne(
+            {"dia": dia, "categoria": categoria},
+            {"$inc": {"total_vendido": total, "quantidade_itens": quantidade}},
+            upsert=True
+        )
+        for (dia, categoria), (total, quantidade) in vendas.items()
+        if total or quantidade
+    ]
+
+    escritas = []
+    if ops_dia:
+        escritas.append(ResumoPedidosDia.get_motor_collection().bulk_write(ops_dia, ordered=False))
+    if ops_vendas:
+        escritas.append(ResumoVendasCategoria.get_motor_collection().bulk_write(ops_vendas, ordered=False))
+    await asyncio.gather(*escritas)
+
+
+async def atualizar_resumo_produtos(categoria_antes: str | None, categoria_depois: str | None):
+    """Move a contagem de um produto entre categorias (None = produto inexistente)."""
+    if categoria_antes == categoria_depois:
+        return
+
+    ops = []
+    if categoria_antes is not None:
+        ops.append(UpdateOne({"categoria": categoria_antes}, {"$inc": {"total_produtos": -1}}, upsert=True))
+    if categoria_depois is not None:
+        ops.append(UpdateOne({"categoria": categoria_depois}, {"$inc": {"total_produtos": 1}}, upsert=True))
+    await ResumoProdutosCategoria.get_motor_collection().bulk_write(ops, ordered=False)
+
+
+async def reconstruir_resumo_produtos():
+    """Recalcula só a contagem de produtos por categoria (usado após importações de produtos)."""
+    pipeline_produtos = [
+        {"$group": {"_id": "$categoria", "total_produtos": {"$sum": 1}}},
+        {"$project": {"_id": 0, "categoria": "$_id", "total_produtos": 1}},
+        {"$out": ResumoProdutosCategoria.get_collection_name()}
+    ]
+    await Produto.get_motor_collection().aggregate(pipeline_produtos).to_list(length=None)
+
+
+async def reconstruir_resumos():
+    """
+    Recalcula todos os resumos a partir de pedidos e produtos.
+    Usado após cargas em massa ou para corrigir divergências; cada $out substitui a coleção inteira.
+    """
+    dia = {"$dateTrunc": {"date": "$data_emissao", "unit": "day"}}
+
+    pipeline_pedidos_dia = [
+        {"$group": {
+            "_id": dia,
+            "total_pedidos": {"$sum": 1},
+            "faturamento_total": {"$sum": "$valor_total"}
+        }},
+        {"$project": {"_id": 0, "dia": "$_id", "total_pedidos": 1, "faturamento_total": 1}},
+        {"$out": ResumoPedidosDia.get_collection_name()}
+    ]
+
+    pipeline_vendas = [
+        {"$match": {"status": {"$ne": StatusPedido.CANCELADO.value}}},
+        {"$unwind": "$itens"},
+        {"$group": {
+            "_id": {"dia": dia, "categoria": {"$ifNull": ["$itens.categoria", "$itens.produto.categoria"]}},
+            "total_vendido": {"$sum": {"$multiply": ["$itens.quantidade", "$itens.preco_unitario"]}},
+            "quantidade_itens": {"$sum": "$itens.quantidade"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "dia": "$_id.dia",
+            "categoria": "$_id.categoria",
+            "total_vendido": 1,
+            "quantidade_itens": 1
+        }},
+        {"$out": ResumoVendasCategoria.get_collection_name()}
+    ]
+
+    pedidos = Pedido.get_motor_collection()
+    await asyncio.gather(
+        pedidos.aggregate(pipeline_pedidos_dia).to_list(length=None),
+        pedidos.aggregate(pipeline_vendas).to_list(length=None),
+        reconstruir_resumo_produtos(),
+    )
+    # Cargas em massa e migrações passam por aqui: os ETags de catálogo e analytics mudam
+    await registrar_alteracao(Produto.Settings.name, Pedido.Settings.name)
+
+
+async def _main():
+    from app.core.database import init_db
+
+    await init_db()
+    print("🔄 Reconstruindo resumos de analytics...")
+    await reconstruir_resumos()
+    print("✅ Resumos reconstruídos!")
+
+
+if __name__ == "__main__":
+    # python -m app.utils.resumos
+    asyncio.run(_main())
@@ -1,115 +1,341 @@
+import argparse
+import asyncio
+import bisect
+import itertools
 import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from bson import DBRef, ObjectId
 from faker import Faker
-from beanie import WriteRules
 
 # Importando os Models dos seus colegas
 from app.models.produto import Produto
-from app.models.cliente import Cliente, Endereco # Endereco é um modelo interno do Cliente
-from app.models.pedido import Pedido, ItemPedido
-
-fake = Faker('pt_BR') # Configura para gerar dados do Brasil
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido, StatusPedido
+from app.models.resumo import ResumoPedidosDia, ResumoVendasCategoria, ResumoProdutosCategoria
+from app.utils.resumos import reconstruir_resumos
+from app.utils.busca import normalizar_busca
+from app.utils.cache_http import registrar_alteracao
 
 CATEGORIAS = ["Eletrônicos", "Livros", "Casa", "Moda", "Brinquedos"]
 
+# Distribuição dos status dos pedidos gerados
+STATUS_PESOS = {
+    StatusPedido.PENDENTE: 10, StatusPedido.PAGO: 20, StatusPedido.ENVIADO: 30,
+    StatusPedido.ENTREGUE: 30, StatusPedido.CANCELADO: 10,
+}
+
+# Sazonalidade: peso de cada mês (jan..dez), com pico na Black Friday e no Natal
+PESOS_MES = [0.8, 0.7, 0.8, 0.8, 1.0, 0.9, 0.9, 1.0, 0.9, 1.0, 1.6, 2.0]
+
+# Peso de cada dia da semana (seg..dom): mais compras no começo da semana
+PESOS_DIA_SEMANA = [1.2, 1.1, 1.0, 1.0, 0.9, 0.8, 1.0]
+
+# Expoente da lei de potência (Zipf) da popularidade de produtos e da frequência de clientes
+EXPOENTE_PRODUTOS = 1.1
+EXPOENTE_CLIENTES = 0.6
+
+
+def _rng(semente: int, colecao: str, lote: int) -> tuple[random.Random, Faker]:
+    """
+    Geradores de um lote derivados só da semente, da coleção e do número do lote.
+    Assim o resultado é o mesmo com qualquer quantidade de processos.
+    """
+    base = f"{semente}:{colecao}:{lote}"
+    rng = random.Random(base)
+    fake = Faker('pt_BR') # Configura para gerar dados do Brasil
+    fake.seed_instance(base)
+    return rng, fake
+
+
+def _pesos_zipf(quantidade: int, expoente: float, rng: random.Random) -> list[float]:
+    """
+    Pesos acumulados de uma lei de potência, embaralhados para que os mais populares
+    não sejam simplesmente os primeiros inseridos.
+    """
+    pesos = [1 / (posicao + 1) ** expoente for posicao in range(quantidade)]
+    rng.shuffle(pesos)
+    return list(itertools.accumulate(pesos))
+
+
+def _pesos_dias(inicio: datetime, dias: int) -> list[float]:
+    """Pesos acumulados de cada dia do período, combinando mês e dia da semana."""
+    pesos = []
+    for deslocamento in range(dias):
+        dia = inicio + timedelta(days=deslocamento)
+        pesos.append(PESOS_MES[dia.month - 1] * PESOS_DIA_SEMANA[dia.weekday()])
+    return list(itertools.accumulate(pesos))
+
+
+def _cpf(indice: int) -> str:
+    """CPF válido e único derivado do índice do cliente (Faker repete CPFs em volume)."""
+    base = [int(d) for d in f"{indice + 100_000_000:09d}"[-9:]]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(base))
+        base.append(0 if soma % 11 < 2 else 11 - soma % 11)
+    cpf = "".join(map(str, base))
+    return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+
+
+def gerar_produtos(semente: int, lote: int, inicio: int, quantidade: int) -> list[dict]:
+    """Gera um lote de produtos já no formato do documento gravado."""
+    rng, fake = _rng(semente, "produtos", lote)
+    produtos = []
+    for _ in range(quantidade):
+        nome = f"{fake.word().capitalize()} {fake.word().capitalize()}"
+        produtos.append({
+            "_id": ObjectId(),
+            "nome": nome,
+            "nome_busca": normalizar_busca(nome),
+            "descricao": fake.sentence(),
+            "preco": round(rng.uniform(10.0, 500.0), 2),
+            "categoria": rng.choice(CATEGORIAS),
+            "estoque": rng.randint(0, 100),
+        })
+    return produtos
+
+
+def gerar_clientes(semente: int, lote: int, inicio: int, quantidade: int) -> list[dict]:
+    """Gera um lote de clientes; email e CPF usam o índice global para nunca repetirem."""
+    _, fake = _rng(semente, "clientes", lote)
+    clientes = []
+    for indice in range(inicio, inicio + quantidade):
+        # O Membro 2 definiu 'Endereco' como um schema/model embutido
+        clientes.append({
+            "_id": ObjectId(),
+            "nome": fake.name(),
+            "email": f"{fake.user_name()}.{indice}@{fake.free_email_domain()}",
+            "cpf": _cpf(indice),
+            "endereco": {
+                "rua": fake.street_name(),
+                "numero": str(fake.building_number()),
+                "bairro": fake.bairro(),
+                "cidade": fake.city(),
+                "estado": fake.estado_sigla(),
+                "cep": fake.postcode(),
+            },
+        })
+    return clientes
+
+
+# Catálogo usado na geração de pedidos, carregado uma vez por processo
+_catalogo: dict = {}
+
+
+def _carregar_catalogo(
+    semente: int,
+    colecoes: tuple[str, str],
+    produtos: list[tuple],
+    clientes: list,
+    inicio: datetime,
+    dias: int
+):
+    """Prepara produtos, clientes e os pesos de popularidade e sazonalidade."""
+    rng = random.Random(f"{semente}:catalogo")
+    _catalogo.update(
+        colecoes=colecoes,
+        produtos=produtos,
+        clientes=clientes,
+        pesos_produtos=_pesos_zipf(len(produtos), EXPOENTE_PRODUTOS, rng),
+        pesos_clientes=_pesos_zipf(len(clientes), EXPOENTE_CLIENTES, rng),
+        inicio=inicio,
+        pesos_dias=_pesos_dias(inicio, dias),
+    )
+
+
+def _sortear(rng: random.Random, pesos_acumulados: list[float]) -> int:
+    """Sorteia um índice proporcional aos pesos acumulados (busca binária)."""
+    return bisect.bisect(pesos_acumulados, rng.random() * pesos_acumulados[-1])
+
+
+def gerar_pedidos(semente: int, lote: int, inicio: int, quantidade: int) -> list[dict]:
+    """
+    Gera um lote de pedidos com itens referenciando produtos (DBRef + cópia de nome/categoria).
+    Produtos e clientes seguem uma lei de potência e as datas seguem a sazonalidade.
+    """
+    rng, _ = _rng(semente, "pedidos", lote)
+    produtos = _catalogo["produtos"]
+    pesos_produtos = _catalogo["pesos_produtos"]
+    status = list(STATUS_PESOS)
+    pesos_status = list(STATUS_PESOS.values())
+    # Nomes vindos do processo principal: o Beanie não é inicializado nos processos de geração
+    colecao_produtos, colecao_clientes = _catalogo["colecoes"]
+
+    pedidos = []
+    for _ in range(quantidade):
+        # Seleciona produtos sem repetir no mesmo pedido
+        escolhidos = {_sortear(rng, pesos_produtos) for _ in range(rng.randint(1, 4))}
+        itens = []
+        valor_total = 0.0
+        for indice in escolhidos:
+            produto_id, nome, categoria, preco = produtos[indice]
+            qtd = rng.randint(1, 3)
+            itens.append({
+                "produto": DBRef(colecao_produtos, produto_id),
+                "nome": nome,
+                "categoria": categoria,
+                "quantidade": qtd,
+                "preco_unitario": preco,
+            })
+            valor_total += preco * qtd
+
+        dia = _catalogo["inicio"] + timedelta(days=_sortear(rng, _catalogo["pesos_dias"]))
+        cliente_id = _catalogo["clientes"][_sortear(rng, _catalogo["pesos_clientes"])]
+
+        pedidos.append({
+            "_id": ObjectId(),
+            "cliente": DBRef(colecao_clientes, cliente_id),
+            "data_emissao": dia + timedelta(seconds=rng.randrange(86400)),
+            "itens": itens,
+            "status": rng.choices(status, pesos_status)[0],
+            "valor_total": round(valor_total, 2),
+            "controla_estoque": False,
+        })
+    return pedidos
+
+
+async def _inserir(modelo, gerar, total: int, semente: int, lote: int, executor, guardar: bool = True) -> list[dict]:
+    """
+    Gera e insere `total` documentos em lotes com insert_many.
+    Com executor, a geração dos próximos lotes roda em paralelo com a inserção do atual.
+    """
+    colecao = modelo.get_motor_collection()
+    loop = asyncio.get_running_loop()
+    lotes = [(numero, inicio, min(lote, total - inicio)) for numero, inicio in enumerate(range(0, total, lote))]
+
+    async def _gerar(numero, inicio, quantidade):
+        if executor is None:
+            return gerar(semente, numero, inicio, quantidade)
+        return await loop.run_in_executor(executor, gerar, semente, numero, inicio, quantidade)
+
+    # Mantém alguns lotes sendo gerados à frente sem carregar o total em memória
+    pendentes = [asyncio.ensure_future(_gerar(*args)) for args in lotes[:4]]
+    proximos = iter(lotes[4:])
+    inseridos = []
+    quantidade = 0
+    while pendentes:
+        documentos = await pendentes.pop(0)
+        args = next(proximos, None)
+        if args is not None:
+            pendentes.append(asyncio.ensure_future(_gerar(*args)))
+        await colecao.insert_many(documentos, ordered=False)
+        quantidade += len(documentos)
+        if guardar:
+            inseridos += documentos
+        print(f"      {quantidade}/{total}")
+    return inseridos
+
+
 async def limpar_banco():
     """
-    Remove todos os dados do banco.
+    Remove todos os dados do banco apagando as coleções (muito mais rápido que delete_all em volume).
+    Os índices declarados nos modelos são recriados em seguida.
     """
+    from app.core.database import criar_indices
+
     print("🗑️  Limpando banco de dados...")
-    await Pedido.delete_all()
-    await Cliente.delete_all()
-    await Produto.delete_all()
+    await asyncio.gather(*(
+        modelo.get_motor_collection().drop()
+        for modelo in (Pedido, Cliente, Produto, ResumoPedidosDia, ResumoVendasCategoria, ResumoProdutosCategoria)
+    ))
+    await criar_indices()
+    await registrar_alteracao(Produto.Settings.name, Pedido.Settings.name)
     print("✅ Banco limpo!")
 
-async def popular_banco(force: bool = False):
+
+async def popular_banco(
+    force: bool = False,
+    produtos: int = 10,
+    clientes: int = 10,
+    pedidos: int = 15,
+    semente: int | None = None,
+    processos: int = 1,
+    lote: int = 5000,
+    dias: int = 365
+):
     """
     Verifica se o banco está vazio e popula com dados fictícios.
     Se force=True, limpa o banco e repopula.
+    Com a mesma semente, os dados gerados são os mesmos (exceto os ObjectIds).
     """
     # 1. Se forçar, limpa tudo primeiro
     if force:
         await limpar_banco()
-    
+
     # 2. Verificar se já existem dados para evitar duplicidade
-    if await Produto.count() > 0:
+    if await Produto.get_motor_collection().estimated_document_count() > 0:
         print("⚠️  Banco já contém dados. Pulando o seed.")
         return
 
-    print("🌱 Iniciando o Seeding (População do Banco)...")
-
-    # --- 2. Criar PRODUTOS ---
-    produtos_db = []
-    print("   -> Criando Produtos...")
-    for _ in range(10):
-        p = Produto(
-            nome=f"{fake.word().capitalize()} {fake.word().capitalize()}",
-            descricao=fake.sentence(),
-            preco=round(random.uniform(10.0, 500.0), 2),
-            categoria=random.choice(CATEGORIAS),
-            estoque=random.randint(0, 100)
-        )
-        await p.insert()
-        produtos_db.append(p)
-    
-    # --- 3. Criar CLIENTES ---
-    clientes_db = []
-    print("   -> Criando Clientes...")
-    for _ in range(10):
-        # O Membro 2 definiu 'Endereco' como um schema/model embutido
-        end = Endereco(
-            rua=fake.street_name(),
-            numero=str(fake.building_number()),
-            bairro=fake.bairro(),
-            cidade=fake.city(),
-            estado=fake.estado_sigla(),
-            cep=fake.postcode()
-        )
-        
-        c = Cliente(
-            nome=fake.name(),
-            email=fake.unique.email(),
-            cpf=fake.cpf(),
-            endereco=end
-        )
-        await c.insert()
-        clientes_db.append(c)
-
-    # --- 4. Criar PEDIDOS ---
-    print("   -> Criando Pedidos...")
-    for _ in range(15): # Vamos criar 15 pedidos para ter massa de teste
-        cliente_random = random.choice(clientes_db)
-        
-        # Gerar de 1 a 4 itens aleatórios para este pedido
-        itens_pedido = []
-        valor_total_calculado = 0.0
-        
-        # Seleciona produtos aleatórios sem repetir no mesmo pedido
-        produtos_selecionados = random.sample(produtos_db, k=random.randint(1, 4))
-        
-        for prod in produtos_selecionados:
-            qtd = random.randint(1, 3)
-            # ItemPedido (definido pelo Membro 2) congela o preço
-            item = ItemPedido(
-                produto=prod, # Link automático do Beanie
-                quantidade=qtd,
-                preco_unitario=prod.preco
-            )
-            itens_pedido.append(item)
-            valor_total_calculado += (prod.preco * qtd)
-
-        # Importante para o Req D/F (Filtro por Data):
-        # Geramos datas espalhadas no último ano
-        data_retroativa = fake.date_time_between(start_date='-1y', end_date='now')
-
-        pedido = Pedido(
-            cliente=cliente_random,
-            itens=itens_pedido,
-            valor_total=round(valor_total_calculado, 2),
-            data_emissao=data_retroativa,
-            status=random.choice(["PENDENTE", "PAGO", "ENVIADO", "CANCELADO"])
+    if semente is None:
+        semente = random.randrange(2**32)
+    print(f"🌱 Iniciando o Seeding (semente {semente})...")
+
+    executor = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+    try:
+        print("   -> Criando Produtos...")
+        docs_produtos = await _inserir(Produto, gerar_produtos, produtos, semente, lote, executor)
+        catalogo = [(p["_id"], p["nome"], p["categoria"], p["preco"]) for p in docs_produtos]
+        del docs_produtos
+
+        print("   -> Criando Clientes...")
+        docs_clientes = await _inserir(Cliente, gerar_clientes, clientes, semente, lote, executor)
+        ids_clientes = [c["_id"] for c in docs_clientes]
+        del docs_clientes
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if pedidos and catalogo and ids_clientes:
+        # Pedidos no último ano; cada processo recebe o catálogo uma única vez
+        inicio = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=dias)
+        colecoes = (Produto.get_collection_name(), Cliente.get_collection_name())
+        args_catalogo = (semente, colecoes, catalogo, ids_clientes, inicio, dias)
+        _carregar_catalogo(*args_catalogo)
+        executor = (
+            ProcessPoolExecutor(max_workers=processos, initializer=_carregar_catalogo, initargs=args_catalogo)
+            if processos > 1 else None
         )
-        
-        # WriteRules.WRITE garante que os links sejam salvos corretamente (se necessário)
-        await pedido.insert(link_rule=WriteRules.WRITE)
+        try:
+            print("   -> Criando Pedidos...")
+            await _inserir(Pedido, gerar_pedidos, pedidos, semente, lote, executor, guardar=False)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    # Os pedidos do seed não passam pelas rotas, então os resumos são recalculados de uma vez
+    print("   -> Reconstruindo resumos de analytics...")
+    await reconstruir_resumos()
+
+    print("✅ Seeding concluído com sucesso!")
+
+
+async def _main(args: argparse.Namespace):
+    from app.core.database import init_db
+
+    await init_db()
+    await popular_banco(
+        force=args.limpar,
+        produtos=args.produtos,
+        clientes=args.clientes,
+        pedidos=args.pedidos,
+        semente=args.semente,
+        processos=args.processos,
+        lote=args.lote,
+        dias=args.dias,
+    )
+
 
-    print("✅ Seeding concluído com sucesso!")
\ No newline at end of file
+if __name__ == "__main__":
+    # python -m app.utils.seeder --produtos 100000 --clientes 50000 --pedidos 1000000 --semente 42 --processos 8 --limpar
+    parser = argparse.ArgumentParser(description="Popula o banco com dados fictícios em volume")
+    parser.add_argument("--produtos", type=int, default=10)
+    parser.add_argument("--clientes", type=int, default=10)
+    parser.add_argument("--pedidos", type=int, default=15)
+    parser.add_argument("--semente", type=int, default=None, help="mesma semente, mesmos dados")
+    parser.add_argument("--processos", type=int, default=1, help="processos gerando dados com o Faker")
+    parser.add_argument("--lote", type=int, default=5000, help="documentos por insert_many")
+    parser.add_argument("--dias", type=int, default=365, help="período (em dias) das datas dos pedidos")
+    parser.add_argument("--limpar", action="store_true", help="apaga as coleções antes de popular")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,103 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from app.core.database import init_db
+from app.models.produto import Produto
+from app.utils.busca import filtro_busca, ordenacao_busca
+from app.utils.seeder import popular_banco
+
+
+def _estrategias(termo: str) -> dict[str, tuple[dict, list]]:
+    """Filtro e ordenação de cada estratégia: o regex antigo e os dois modos da busca atual."""
+    return {
+        "regex (antigo)": ({"nome": {"$regex": termo, "$options": "i"}}, [("_id", 1)]),
+        "texto": (filtro_busca(termo, "texto"), ordenacao_busca("texto")),
+        "prefixo": (filtro_busca(termo[:3], "prefixo"), ordenacao_busca("prefixo")),
+    }
+
+
+async def _termos(quantidade: int, semente: int) -> list[str]:
+    """Sorteia palavras de nomes de produtos existentes para usar como termos de busca."""
+    amostra = await Produto.get_motor_collection().aggregate([
+        {"$sample": {"size": quantidade}},
+        {"$project": {"nome": 1}},
+    ]).to_list(length=None)
+    rng = random.Random(semente)
+    return [rng.choice(produto["nome"].split()) for produto in amostra]
+
+
+async def _examinados(filtro: dict, ordem: list, limit: int) -> tuple[int, int]:
+    """Chaves de índice e documentos examinados (explain executionStats)."""
+    colecao = Produto.get_motor_collection()
+    resultado = await colecao.database.command({
+        "explain": {"find": colecao.name, "filter": filtro, "sort": dict(ordem), "limit": limit},
+        "verbosity": "executionStats",
+    })
+    stats = resultado["executionStats"]
+    return stats["totalKeysExamined"], stats["totalDocsExamined"]
+
+
+async def comparar(termos: list[str], repeticoes: int, limit: int) -> dict[str, dict]:
+    """Mede cada estratégia com os mesmos termos: latência (p50/p95) e trabalho por consulta."""
+    colecao = Produto.get_motor_collection()
+    resultados = {}
+    for nome in _estrategias("x"):
+        latencias, chaves, documentos = [], [], []
+        for termo in termos:
+            filtro, ordem = _estrategias(termo)[nome]
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                await colecao.find(filtro).sort(ordem).limit(limit).to_list(length=None)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            examinadas, examinados = await _examinados(filtro, ordem, limit)
+            chaves.append(examinadas)
+            documentos.append(examinados)
+
+        latencias.sort()
+        resultados[nome] = {
+            "p50": statistics.median(latencias),
+            "p95": latencias[int(len(latencias) * 0.95) - 1],
+            "chaves": statistics.mean(chaves),
+            "documentos": statistics.mean(documentos),
+        }
+    return resultados
+
+
+async def _main(args) -> int:
+    await init_db()
+    if args.popular:
+        # Apaga as coleções do DATABASE_NAME configurado: use um banco só para o benchmark
+        await popular_banco(
+            force=True, produtos=args.produtos, clientes=0, pedidos=0,
+            semente=args.semente, processos=os.cpu_count() or 1
+        )
+
+    total = await Produto.get_motor_collection().estimated_document_count()
+    termos = await _termos(args.termos, args.semente)
+    if not termos:
+        print("❌ Nenhum produto no banco. Use --popular.")
+        return 1
+
+    print(f"Catálogo: {total} produtos | {len(termos)} termos x {args.repeticoes} repetições")
+    resultados = await comparar(termos, args.repeticoes, args.limit)
+    print(f"{'estratégia':<16}{'p50 (ms)':>10}{'p95 (ms)':>10}{'chaves':>12}{'documentos':>12}")
+    for nome, r in resultados.items():
+        print(f"{nome:<16}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['chaves']:>12.0f}{r['documentos']:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    # DATABASE_NAME=bench_busca python -m benchmarks.busca_produtos --popular --produtos 1000000
+    parser = argparse.ArgumentParser(description="Compara a busca por regex com $text e prefixo")
+    parser.add_argument("--popular", action="store_true", help="Recria o catálogo antes de medir (apaga o banco)")
+    parser.add_argument("--produtos", type=int, default=1_000_000, help="Tamanho do catálogo com --popular")
+    parser.add_argument("--termos", type=int, default=50, help="Quantidade de termos sorteados")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções de cada termo")
+    parser.add_argument("--limit", type=int, default=11, help="Itens por consulta (page_size + 1)")
+    parser.add_argument("--semente", type=int, default=42)
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+# Dependência só do benchmark: pip install -e ".[bench]"
+import httpx
+
+from app.core.database import init_db
+from app.core.metricas import latencia_mongo
+from app.main import app
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.utils.seeder import popular_banco
+from benchmarks.busca_produtos import _termos
+
+# Tamanhos dos conjuntos de dados: (produtos, clientes, pedidos)
+ESCALAS = {
+    "10k": (2_000, 5_000, 10_000),
+    "1m": (50_000, 200_000, 1_000_000),
+}
+
+# Cada cenário recebe o gerador aleatório e os dados sorteados e devolve (método, url, corpo)
+Cenario = Callable[[random.Random, dict], tuple[str, str, dict | None]]
+
+
+def _criar_pedido(rng: random.Random, amostra: dict) -> tuple[str, str, dict]:
+    itens = [
+        {"produto_id": str(produto_id), "quantidade": rng.randint(1, 3)}
+        for produto_id in rng.sample(amostra["produtos"], min(len(amostra["produtos"]), rng.randint(1, 5)))
+    ]
+    return "POST", "/pedidos/", {"cliente_id": str(rng.choice(amostra["clientes"])), "itens": itens}
+
+
+CENARIOS: dict[str, Cenario] = {
+    "POST /pedidos": _criar_pedido,
+    "GET /pedidos": lambda rng, amostra: ("GET", f"/pedidos/?page={rng.randint(1, 20)}&page_size=20", None),
+    "GET /pedidos?status": lambda rng, amostra: ("GET", "/pedidos/?status=PENDENTE&page_size=20&count=none", None),
+    "GET /produtos?termo (texto)": lambda rng, amostra: (
+        "GET", f"/produtos/?termo={rng.choice(amostra['termos'])}&page_size=20", None
+    ),
+    "GET /produtos?termo (prefixo)": lambda rng, amostra: (
+        "GET", f"/produtos/?termo={rng.choice(amostra['termos'])[:3]}&busca=prefixo&page_size=20", None
+    ),
+    "GET /analytics/produtos-por-categoria": lambda rng, amostra: ("GET", "/analytics/produtos-por-categoria", None),
+    "GET /analytics/ticket-medio": lambda rng, amostra: ("GET", "/analytics/ticket-medio", None),
+    "GET /analytics/vendas-por-categoria": lambda rng, amostra: ("GET", "/analytics/vendas-por-categoria", None),
+    "GET /analytics/pedidos-por-periodo": lambda rng, amostra: (
+        "GET", f"/analytics/pedidos-por-periodo?ano={amostra['ano']}&mes={rng.randint(1, 12)}&page_size=50", None
+    ),
+}
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """Percentil pelo método nearest-rank (valores já ordenados)."""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+async def _amostra(semente: int) -> dict:
+    """IDs e termos sorteados do banco, usados para montar as requisições."""
+    produtos, clientes, termos = await asyncio.gather(
+        Produto.get_motor_collection().aggregate([{"$sample": {"size": 1000}}, {"$project": {"_id": 1}}]).to_list(length=None),
+        Cliente.get_motor_collection().aggregate([{"$sample": {"size": 1000}}, {"$project": {"_id": 1}}]).to_list(length=None),
+        _termos(200, semente),
+    )
+    return {
+        "produtos": [produto["_id"] for produto in produtos],
+        "clientes": [cliente["_id"] for cliente in clientes],
+        "termos": termos,
+        "ano": datetime.now(timezone.utc).year,
+    }
+
+
+async def medir(
+    cliente: httpx.AsyncClient,
+    cenario: Cenario,
+    amostra: dict,
+    requisicoes: int,
+    concorrencia: int,
+    aquecimento: int,
+    semente: int
+) -> dict:
+    """Dispara as requisições do cenário com `concorrencia` clientes simultâneos."""
+    rng = random.Random(semente)
+    pedidos = [cenario(rng, amostra) for _ in range(aquecimento + requisicoes)]
+
+    for metodo, url, corpo in pedidos[:aquecimento]:
+        await cliente.request(metodo, url, json=corpo)
+
+    fila = iter(pedidos[aquecimento:])
+    latencias: list[float] = []
+    status: dict[str, int] = {}
+
+    async def _trabalhador():
+        for metodo, url, corpo in fila:
+            inicio = time.perf_counter()
+            resposta = await cliente.request(metodo, url, json=corpo)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            status[str(resposta.status_code)] = status.get(str(resposta.status_code), 0) + 1
+
+    comandos_antes = latencia_mongo.total()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_trabalhador() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    comandos = latencia_mongo.total() - comandos_antes
+
+    latencias.sort()
+    return {
+        "requisicoes": len(latencias),
+        "p50_ms": round(percentil(latencias, 50), 3),
+        "p95_ms": round(percentil(latencias, 95), 3),
+        "p99_ms": round(percentil(latencias, 99), 3),
+        "media_ms": round(sum(latencias) / len(latencias), 3),
+        "rps": round(len(latencias) / duracao, 1),
+        "comandos_por_requisicao": round(comandos / len(latencias), 2),
+        "erros": sum(total for codigo, total in status.items() if not codigo.startswith("2")),
+        "status": status,
+    }
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Regressões em relação ao baseline: p95 maior ou vazão menor além da tolerância."""
+    regressoes = []
+    for nome, medida in atual["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(nome)
+        if not base:
+            continue
+        if medida["p95_ms"] > base["p95_ms"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {base['p95_ms']:.2f} -> {medida['p95_ms']:.2f} ms")
+        if medida["rps"] < base["rps"] * (1 - tolerancia):
+            regressoes.append(f"{nome}: vazão {base['rps']:.1f} -> {medida['rps']:.1f} req/s")
+    return regressoes
+
+
+def _imprimir(resultado: dict, baseline: dict | None):
+    print(f"{'endpoint':<40}{'p50':>9}{'p95':>9}{'p99':>9}{'req/s':>9}{'cmds':>7}{'erros':>7}{'Δp95':>9}")
+    for nome, r in resultado["endpoints"].items():
+        base = (baseline or {}).get("endpoints", {}).get(nome)
+        delta = f"{(r['p95_ms'] / base['p95_ms'] - 1) * 100:+.0f}%" if base and base["p95_ms"] else "-"
+        print(
+            f"{nome:<40}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+            f"{r['rps']:>9.1f}{r['comandos_por_requisicao']:>7.1f}{r['erros']:>7}{delta:>9}"
+        )
+
+
+async def _main(args) -> int:
+    await init_db()
+    if args.popular:
+        # Apaga as coleções do DATABASE_NAME configurado: use um banco só para o benchmark
+        produtos, clientes, pedidos = ESCALAS[args.escala]
+        await popular_banco(
+            force=True, produtos=produtos, clientes=clientes, pedidos=pedidos,
+            semente=args.semente, processos=os.cpu_count() or 1
+        )
+    # Estoque folgado: o cenário de criação mede a latência, não a falta de estoque
+    await Produto.get_motor_collection().update_many({}, {"$set": {"estoque": 10_000_000}})
+
+    amostra = await _amostra(args.semente)
+    if not amostra["produtos"] or not amostra["clientes"]:
+        print("❌ Banco vazio. Use --popular.")
+        return 1
+
+    cenarios = {nome: c for nome, c in CENARIOS.items() if not args.endpoints or any(e in nome for e in args.endpoints)}
+    resultado = {
+        "meta": {
+            "data": datetime.now(timezone.utc).isoformat(),
+            "escala": args.escala,
+            "pedidos_no_banco": await Pedido.get_motor_collection().estimated_document_count(),
+            "requisicoes": args.requisicoes,
+            "concorrencia": args.concorrencia,
+            "python": platform.python_version(),
+        },
+        "endpoints": {},
+    }
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for indice, (nome, cenario) in enumerate(cenarios.items()):
+            resultado["endpoints"][nome] = await medir(
+                cliente, cenario, amostra, args.requisicoes, args.concorrencia, args.aquecimento,
+                args.semente + indice
+            )
+            print(f"   ✓ {nome}")
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+    _imprimir(resultado, baseline)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.saida}")
+
+    if baseline:
+        regressoes = comparar(resultado, baseline, args.tolerancia)
+        for regressao in regressoes:
+            print(f"❌ {regressao}")
+        if regressoes:
+            return 1
+        print(f"✅ Sem regressões acima de {args.tolerancia:.0%} em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    # DATABASE_NAME=bench_api python -m benchmarks.carga_api --popular --escala 10k --saida atual.json
+    # python -m benchmarks.carga_api --baseline baseline.json --saida atual.json
+    parser = argparse.ArgumentParser(description="Latência e vazão dos endpoints da API (via ASGI, sem rede)")
+    parser.add_argument("--popular", action="store_true", help="Recria o banco na escala escolhida (apaga o banco)")
+    parser.add_argument("--escala", choices=ESCALAS, default="10k", help="Tamanho do conjunto de dados")
+    parser.add_argument("--requisicoes", type=int, default=500, help="Requisições medidas por endpoint")
+    parser.add_argument("--concorrencia", type=int, default=16, help="Requisições simultâneas")
+    parser.add_argument("--aquecimento", type=int, default=20, help="Requisições descartadas antes de medir")
+    parser.add_argument("--endpoints", nargs="*", help="Só os cenários cujo nome contém um destes trechos")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados desta execução")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora aceita antes de acusar regressão")
+    parser.add_argument("--semente", type=int, default=42)
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import sys
+import time
+
+from fastapi import HTTPException
+
+from app.core.database import init_db, suporta_transacoes
+from app.models.cliente import Cliente
+from app.models.pedido import Pedido
+from app.models.produto import Produto
+from app.routes.pedido_routes import criar_pedido
+from app.schemas.pedido import ItemPedidoCreate, PedidoCreate
+from app.utils.resumos import atualizar_resumos, contribuicao
+
+
+async def _tentar_pedido(dados: PedidoCreate) -> int:
+    """Cria um pedido pela rota e devolve o status HTTP equivalente."""
+    try:
+        await criar_pedido(dados)
+        return 201
+    except HTTPException as exc:
+        return exc.status_code
+
+
+async def estressar(pedidos: int, estoque: int, quantidade: int) -> bool:
+    """
+    Dispara pedidos simultâneos do mesmo produto e confere que não houve venda além do estoque
+    nem atualização perdida: estoque final = inicial - vendido, e nunca negativo.
+    """
+    produto = Produto(nome="SKU Estresse", preco=10.0, categoria="Estresse", estoque=estoque)
+    cliente = Cliente(nome="Cliente Estresse", email=f"estresse{time.time_ns()}@exemplo.com", cpf=str(time.time_ns()))
+    await asyncio.gather(produto.insert(), cliente.insert())
+
+    dados = PedidoCreate(
+        cliente_id=cliente.id,
+        itens=[ItemPedidoCreate(produto_id=produto.id, quantidade=quantidade)]
+    )
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(_tentar_pedido(dados) for _ in range(pedidos)))
+    duracao = time.perf_counter() - inicio
+
+    aceitos = resultados.count(201)
+    recusados = resultados.count(409)
+    estoque_final = (await Produto.get(produto.id)).estoque
+    gravados = await Pedido.find(Pedido.cliente.id == cliente.id).count()
+
+    esperado_aceitos = min(pedidos, estoque // quantidade)
+    ok = (
+        aceitos == esperado_aceitos
+        and aceitos + recusados == pedidos
+        and gravados == aceitos
+        and estoque_final == estoque - aceitos * quantidade
+        and estoque_final >= 0
+    )
+
+    print(f"Transações: {'sim' if await suporta_transacoes() else 'não (compensação)'}")
+    print(f"{pedidos} pedidos simultâneos em {duracao:.2f}s ({pedidos / duracao:.0f} pedidos/s)")
+    print(f"Aceitos: {aceitos} (esperado {esperado_aceitos}) | Recusados por estoque: {recusados}")
+    print(f"Estoque: {estoque} -> {estoque_final} | Pedidos gravados: {gravados}")
+
+    # Remove os dados do teste, descontando os pedidos dos resumos de analytics
+    pedidos_teste = await Pedido.find(Pedido.cliente.id == cliente.id).to_list()
+    await asyncio.gather(*(atualizar_resumos(contribuicao(p), None) for p in pedidos_teste))
+    await Pedido.find(Pedido.cliente.id == cliente.id).delete()
+    await asyncio.gather(produto.delete(), cliente.delete())
+    return ok
+
+
+async def _main(args) -> int:
+    await init_db()
+    ok = await estressar(args.pedidos, args.estoque, args.quantidade)
+    print("✅ Nenhuma venda além do estoque." if ok else "❌ Inconsistência de estoque!")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.estresse_estoque --pedidos 300 --estoque 100
+    parser = argparse.ArgumentParser(description="Teste de concorrência da reserva de estoque")
+    parser.add_argument("--pedidos", type=int, default=300, help="Pedidos simultâneos")
+    parser.add_argument("--estoque", type=int, default=100, help="Estoque inicial do SKU")
+    parser.add_argument("--quantidade", type=int, default=1, help="Unidades por pedido")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
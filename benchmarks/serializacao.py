@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import sys
+import time
+from typing import Callable
+
+from fastapi import __version__ as versao_fastapi
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from pydantic import EmailStr, TypeAdapter
+
+from app.core.database import init_db
+from app.core.respostas import CAMINHO_RAPIDO, classe_resposta_padrao
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.schemas.cliente import ClienteResponse
+from app.schemas.pedido import PaginatedResponse, PedidoResponse
+from app.schemas.produto import ProdutoCatalogoResponse
+from app.utils.consultas_pedido import PROJECAO_CLIENTE, buscar_pedidos
+from app.utils.consultas_produto import PROJECAO_CATALOGO
+from app.utils.paginacao import ordenacao
+
+
+# Esquemas como eram antes: o email da resposta passava de novo pelo email-validator
+class ClienteResponseAntigo(ClienteResponse):
+    email: EmailStr
+
+
+class PedidoResponseAntigo(PedidoResponse):
+    cliente: ClienteResponseAntigo | None = None
+
+
+# Sem classe própria: o que o FastAPI instalado faz com a classe de resposta padrão dele
+PADRAO_FASTAPI = Default(JSONResponse)
+
+
+def _pagina(modelo, itens: list, resposta=None) -> bytes:
+    """
+    O que a rota faz com a página (como o FastAPI instalado): valida em PaginatedResponse e gera
+    o corpo pelo caminho rápido (dump_json) ou convertendo em tipos JSON e renderizando com a classe.
+    """
+    resposta = resposta or classe_resposta_padrao()
+    tipo = PaginatedResponse[modelo]
+    pagina = tipo(items=itens, page=1, page_size=len(itens), total_items=len(itens), total_pages=1)
+    if isinstance(resposta, DefaultPlaceholder):
+        if CAMINHO_RAPIDO:
+            return TypeAdapter(tipo).dump_json(pagina)
+        resposta = resposta.value
+    return resposta(TypeAdapter(tipo).dump_python(pagina, mode="json")).body
+
+
+def _cenarios(brutos: dict[str, list[dict]]) -> dict[str, tuple[Callable[[], bytes], Callable[[], bytes]]]:
+    """(antes, depois) de cada listagem, sempre a partir dos documentos já lidos do banco."""
+    return {
+        "GET /produtos": (
+            # Antes: um Document do Beanie por produto (com normalizar_busca), a página validada de novo
+            # e o corpo gerado pela classe de resposta padrão do FastAPI
+            lambda: _pagina(Produto, [Produto.model_validate(doc) for doc in brutos["produtos"]], PADRAO_FASTAPI),
+            lambda: _pagina(ProdutoCatalogoResponse, brutos["produtos_projetados"]),
+        ),
+        "GET /clientes": (
+            lambda: _pagina(ClienteResponseAntigo, [
+                Cliente.model_validate(doc).model_dump() | {"id": doc["_id"]} for doc in brutos["clientes"]
+            ], PADRAO_FASTAPI),
+            lambda: _pagina(ClienteResponse, brutos["clientes_projetados"]),
+        ),
+        "GET /pedidos": (
+            lambda: _pagina(PedidoResponseAntigo, brutos["pedidos"], PADRAO_FASTAPI),
+            lambda: _pagina(PedidoResponse, brutos["pedidos"]),
+        ),
+    }
+
+
+def _medir(funcao: Callable[[], bytes], repeticoes: int) -> tuple[float, int]:
+    """Tempo de CPU médio por página (ms) e tamanho do JSON gerado."""
+    corpo = funcao()  # aquecimento (e compila os validadores dos genéricos)
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.process_time() - inicio) / repeticoes * 1000, len(corpo)
+
+
+async def _documentos(page_size: int) -> dict[str, list[dict]]:
+    """Uma página real de cada coleção, crua e projetada como a rota lê hoje."""
+    produtos = Produto.get_motor_collection()
+    clientes = Cliente.get_motor_collection()
+    resultados = await asyncio.gather(
+        produtos.find({}).sort(ordenacao()).limit(page_size).to_list(length=None),
+        produtos.find({}, PROJECAO_CATALOGO).sort(ordenacao()).limit(page_size).to_list(length=None),
+        clientes.find({}).sort(ordenacao()).limit(page_size).to_list(length=None),
+        clientes.find({}, PROJECAO_CLIENTE).sort(ordenacao()).limit(page_size).to_list(length=None),
+        buscar_pedidos({}, ordenacao(), limit=page_size),
+    )
+    return dict(zip(("produtos", "produtos_projetados", "clientes", "clientes_projetados", "pedidos"), resultados))
+
+
+async def _main(args) -> int:
+    await init_db()
+    brutos = await _documentos(args.page_size)
+    if not all(brutos.values()):
+        print("❌ O banco precisa de produtos, clientes e pedidos (rode o seeder).")
+        return 1
+
+    caminho = "dump_json do FastAPI" if CAMINHO_RAPIDO else "orjson (RespostaJSON)"
+    print(f"FastAPI {versao_fastapi} | corpo via {caminho}")
+    print(f"Página de {args.page_size} itens | {args.repeticoes} repetições (tempo de CPU)")
+    print(f"{'listagem':<16}{'antes (ms)':>12}{'depois (ms)':>13}{'ganho':>8}{'JSON (KB)':>11}")
+    for nome, (antes, depois) in _cenarios(brutos).items():
+        tempo_antes, _ = _medir(antes, args.repeticoes)
+        tempo_depois, tamanho = _medir(depois, args.repeticoes)
+        print(
+            f"{nome:<16}{tempo_antes:>12.3f}{tempo_depois:>13.3f}"
+            f"{tempo_antes / tempo_depois:>7.1f}x{tamanho / 1024:>11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.serializacao --page-size 100
+    parser = argparse.ArgumentParser(description="Custo de validar e serializar uma página das listagens")
+    parser.add_argument("--page-size", type=int, default=100, help="Itens por página")
+    parser.add_argument("--repeticoes", type=int, default=200, help="Serializações medidas por listagem")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,46 @@
+import asyncio
+import os
+
+import pytest
+
+# Os testes rodam contra um MongoDB de verdade: sem MONGODB_URL eles são pulados.
+# Usam um banco próprio, apagado ao final da sessão.
+MONGODB_URL = os.environ.get("MONGODB_URL")
+BANCO_TESTES = os.environ.get("MONGODB_TEST_DATABASE", "trabalho3_testes")
+
+os.environ.setdefault("PROJECT_NAME", "Trabalho3 Testes")
+os.environ["MONGO_URI"] = MONGODB_URL or "mongodb://localhost:27017"
+os.environ["DATABASE_NAME"] = BANCO_TESTES
+
+
+@pytest.fixture(scope="session")
+def banco_testes():
+    if not MONGODB_URL:
+        pytest.skip("MONGODB_URL não definida: estes testes rodam contra um MongoDB de verdade")
+    yield BANCO_TESTES
+
+    from pymongo import MongoClient
+
+    with MongoClient(MONGODB_URL) as cliente:
+        cliente.drop_database(BANCO_TESTES)
+
+
+@pytest.fixture
+def executar(banco_testes):
+    """
+    Roda uma corrotina com o banco de testes inicializado (modelos e índices).
+    Cada teste usa o próprio event loop, então o cliente é criado e fechado dentro dele.
+    """
+    def _executar(funcao, *args, **kwargs):
+        async def _com_banco():
+            from app.core import database
+
+            await database.init_db()
+            try:
+                return await funcao(*args, **kwargs)
+            finally:
+                database.client.close()
+
+        return asyncio.run(_com_banco())
+
+    return _executar
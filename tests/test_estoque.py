@@ -0,0 +1,43 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models.produto import Produto
+from app.utils.estoque import gravar_com_estoque
+from benchmarks.estresse_estoque import estressar
+
+
+@pytest.mark.parametrize(("pedidos", "estoque", "quantidade"), [(200, 50, 1), (100, 50, 3)])
+def test_pedidos_simultaneos_nao_vendem_alem_do_estoque(executar, pedidos, estoque, quantidade):
+    assert executar(estressar, pedidos, estoque, quantidade)
+
+
+async def _reservar_sem_saldo() -> tuple[HTTPException, list[int]]:
+    produtos = [
+        Produto(nome=f"Estoque {indice}", preco=10.0, categoria="Testes", estoque=estoque, sku=f"TESTE-{indice}")
+        for indice, estoque in enumerate((5, 1, 0))
+    ]
+    for produto in produtos:
+        await produto.insert()
+
+    async def _escrita(sessao):
+        raise AssertionError("a escrita não deveria rodar sem estoque")
+
+    delta = {produtos[0].id: 3, produtos[1].id: 2, produtos[2].id: 1}
+    try:
+        await gravar_com_estoque(delta, _escrita)
+    except HTTPException as exc:
+        erro = exc
+    else:
+        raise AssertionError("a reserva sem saldo deveria falhar")
+
+    finais = [(await Produto.get(produto.id)).estoque for produto in produtos]
+    await Produto.find({"categoria": "Testes"}).delete()
+    return erro, finais
+
+
+def test_reserva_sem_saldo_aponta_todas_as_linhas_e_devolve_o_estoque(executar):
+    erro, finais = executar(_reservar_sem_saldo)
+    assert erro.status_code == 409
+    assert "Estoque 1" in erro.detail and "Estoque 2" in erro.detail
+    assert "Estoque 0" not in erro.detail
+    assert finais == [5, 1, 0]
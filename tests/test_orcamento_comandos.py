@@ -0,0 +1,24 @@
+import time
+
+import httpx
+
+from app.main import app
+from app.models.cliente import Cliente
+from app.models.produto import Produto
+from app.utils.orcamento_comandos import verificar_orcamentos
+
+
+async def _verificar() -> list[str]:
+    sufixo = time.time_ns()
+    await Cliente(nome="Cliente Orçamento", email=f"orcamento{sufixo}@exemplo.com", cpf=str(sufixo)).insert()
+    await Produto.insert_many([
+        Produto(nome=f"Produto Orçamento {i}", preco=10.0, categoria="Orçamento", estoque=100, sku=f"ORC-{sufixo}-{i}")
+        for i in range(20)
+    ])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://orcamento") as http:
+        return await verificar_orcamentos(http)
+
+
+def test_rotas_dentro_do_orcamento_de_comandos(executar):
+    # Os limites dependem da topologia: rode contra um replica set e contra um standalone
+    assert executar(_verificar) == []
@@ -0,0 +1,20 @@
+import pytest
+
+from app.utils.plano_consultas import consultas, explicar
+
+
+def _formatos(prefixo: str) -> list:
+    return [pytest.param(*formato, id=formato[0]) for formato in consultas() if formato[0].startswith(prefixo)]
+
+
+@pytest.mark.parametrize(("nome", "modelo", "filtro", "ordem"), _formatos("pedidos:"))
+def test_consultas_de_pedidos_usam_indice(executar, nome, modelo, filtro, ordem):
+    estagios = executar(explicar, modelo, filtro, ordem)
+    assert "COLLSCAN" not in estagios, f"{nome}: {' <- '.join(estagios)}"
+    assert "IXSCAN" in estagios, f"{nome}: {' <- '.join(estagios)}"
+
+
+@pytest.mark.parametrize(("nome", "modelo", "filtro", "ordem"), _formatos("produtos:"))
+def test_filtros_do_catalogo_nao_fazem_collscan(executar, nome, modelo, filtro, ordem):
+    estagios = executar(explicar, modelo, filtro, ordem)
+    assert "COLLSCAN" not in estagios, f"{nome}: {' <- '.join(estagios)}"